@@ -5,6 +5,11 @@ Runs on port 8080 by default.
 """
 
 import os
+import json
+import time
+import uuid
+import hashlib
+import threading
 import mimetypes
 from pathlib import Path
 from flask import (
@@ -17,6 +22,21 @@ app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024 * 1024  # 5GB max upload
 BASE_DIR = os.environ.get('WORKSPACE', '/workspace')
 
+# Seconds a downloaded file may be reused before revalidating via ETag
+DOWNLOAD_MAX_AGE = 60
+
+# Resumable uploads: session state lives here so uploads survive restarts
+UPLOAD_STATE_DIR = os.path.join(BASE_DIR, '.uploads')
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Bytes read from the request per pwrite, which bounds memory per chunk
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Sessions without a new chunk for this many seconds are discarded
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+
+_UPLOAD_LOCKS = {}
+_UPLOAD_LOCKS_GUARD = threading.Lock()
+
 
 # ---------------------------------------------------------------------
 # HTML TEMPLATE
@@ -112,9 +132,10 @@ HTML_TEMPLATE = '''
     </div>
 
     <div class="toolbar">
-        <form action="{{ url_for('upload', path=current_path) }}" method="post" enctype="multipart/form-data">
+        <form id="upload-form" action="{{ url_for('upload', path=current_path) }}" method="post" enctype="multipart/form-data">
             <input type="file" name="file">
             <button type="submit">Upload</button>
+            <span id="upload-progress"></span>
         </form>
         <a class="btn" href="{{ url_for('edit_file', path=current_path) }}">New File</a>
     </div>
@@ -145,6 +166,75 @@ HTML_TEMPLATE = '''
         {% endfor %}
     </table>
 </div>
+<script>
+// Large files go through the resumable chunked upload API
+const CHUNKED_THRESHOLD = 64 * 1024 * 1024;
+const PARALLEL_CHUNKS = 4;
+
+async function sha256Hex(buffer) {
+    const digest = await crypto.subtle.digest("SHA-256", buffer);
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, "0")).join("");
+}
+
+async function chunkedUpload(file, dir, progress) {
+    const key = "upload:" + dir + "/" + file.name + ":" + file.size + ":" + file.lastModified;
+    let status = null;
+    const saved = localStorage.getItem(key);
+    if (saved) {
+        const r = await fetch("{{ url_for('upload_status', upload_id='ID') }}".replace("ID", saved));
+        if (r.ok) status = await r.json();
+    }
+    if (!status) {
+        const r = await fetch("{{ url_for('upload_start', path=current_path) }}", {
+            method: "POST",
+            headers: {"Content-Type": "application/json"},
+            body: JSON.stringify({filename: file.name, size: file.size})
+        });
+        if (!r.ok) throw new Error((await r.json()).error);
+        status = await r.json();
+        localStorage.setItem(key, status.upload_id);
+    }
+
+    const id = status.upload_id;
+    const queue = status.missing.slice();
+    let done = status.received.length;
+    const total = done + queue.length;
+
+    async function worker() {
+        while (queue.length) {
+            const index = queue.shift();
+            const start = index * status.chunk_size;
+            const buffer = await file.slice(start, start + status.chunk_size).arrayBuffer();
+            const r = await fetch("{{ url_for('upload_chunk', upload_id='ID', index=0) }}"
+                .replace("ID", id).replace(/0$/, index), {
+                method: "PUT",
+                headers: {"X-Chunk-SHA256": await sha256Hex(buffer)},
+                body: buffer
+            });
+            if (!r.ok) throw new Error((await r.json()).error);
+            progress.textContent = Math.round(++done * 100 / total) + "%";
+        }
+    }
+    await Promise.all(Array.from({length: PARALLEL_CHUNKS}, worker));
+
+    const r = await fetch("{{ url_for('upload_complete', upload_id='ID') }}".replace("ID", id), {method: "POST"});
+    if (!r.ok) throw new Error((await r.json()).error);
+    localStorage.removeItem(key);
+}
+
+document.getElementById("upload-form").addEventListener("submit", async (e) => {
+    const file = e.target.file.files[0];
+    if (!file || file.size < CHUNKED_THRESHOLD) return;
+    e.preventDefault();
+    const progress = document.getElementById("upload-progress");
+    try {
+        await chunkedUpload(file, "{{ current_path }}", progress);
+        location.reload();
+    } catch (err) {
+        progress.textContent = "Upload failed: " + err.message + " (submit again to resume)";
+    }
+});
+</script>
 </body>
 </html>
 '''
@@ -161,6 +251,127 @@ def safe_path(path: str) -> Path:
     return full
 
 
+def _upload_lock(upload_id: str) -> threading.Lock:
+    with _UPLOAD_LOCKS_GUARD:
+        if upload_id not in _UPLOAD_LOCKS:
+            _UPLOAD_LOCKS[upload_id] = threading.Lock()
+        return _UPLOAD_LOCKS[upload_id]
+
+
+def _drop_upload_lock(upload_id: str):
+    with _UPLOAD_LOCKS_GUARD:
+        _UPLOAD_LOCKS.pop(upload_id, None)
+
+
+def _state_path(upload_id: str) -> str:
+    if not upload_id.isalnum():
+        raise PermissionError("Invalid upload id")
+    return os.path.join(UPLOAD_STATE_DIR, upload_id + ".json")
+
+
+def _upload_paths(upload_id: str, rel_target: str):
+    """(target, part) for a session, re-checked against BASE_DIR."""
+    target = safe_path(rel_target)
+    return str(target), str(target) + f".{upload_id[:8]}.part"
+
+
+def _load_upload(upload_id: str):
+    """
+    Load a session's state, or None if the id is malformed or unknown.
+    The state file sits inside BASE_DIR and can be edited like any other
+    file, so only the relative target is stored and both paths are
+    rebuilt through safe_path on every load; a target outside BASE_DIR
+    makes the session unknown.
+    """
+    try:
+        path = _state_path(upload_id)
+    except PermissionError:
+        return None
+
+    try:
+        with open(path, "r") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    try:
+        state["target"], state["part"] = _upload_paths(upload_id, state["rel_target"])
+    except PermissionError:
+        return None
+    state["upload_id"] = upload_id
+    return state
+
+
+def _save_upload(state: dict):
+    os.makedirs(UPLOAD_STATE_DIR, exist_ok=True)
+    path = _state_path(state["upload_id"])
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({k: v for k, v in state.items() if k not in ("target", "part")}, f)
+    os.replace(tmp, path)
+
+
+def _upload_status(state: dict) -> dict:
+    received = set(state["received"])
+    return {
+        "upload_id": state["upload_id"],
+        "target": state["rel_target"],
+        "size": state["size"],
+        "chunk_size": state["chunk_size"],
+        "chunks": state["chunks"],
+        "received": sorted(received),
+        "missing": [i for i in range(state["chunks"]) if i not in received]
+    }
+
+
+def _discard_upload(state: dict):
+    for path in (state["part"], _state_path(state["upload_id"])):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _expire_uploads():
+    """Discard sessions (state file and .part) idle for UPLOAD_SESSION_TTL."""
+    cutoff = time.time() - UPLOAD_SESSION_TTL
+    try:
+        names = os.listdir(UPLOAD_STATE_DIR)
+    except FileNotFoundError:
+        return
+
+    for name in names:
+        upload_id, ext = os.path.splitext(name)
+        if ext != ".json" or not upload_id.isalnum():
+            continue
+        try:
+            if os.path.getmtime(os.path.join(UPLOAD_STATE_DIR, name)) > cutoff:
+                continue
+            with _upload_lock(upload_id):
+                state = _load_upload(upload_id)
+                if state is not None:
+                    _discard_upload(state)
+                else:
+                    os.remove(_state_path(upload_id))
+        except (OSError, ValueError):
+            continue
+        _drop_upload_lock(upload_id)
+
+
+def send_cached(path: Path, **kwargs):
+    """
+    send_file with a strong size+mtime ETag, Range support (206 / 416),
+    304 Not Modified and Cache-Control headers.
+    """
+    st = path.stat()
+    return send_file(
+        path,
+        conditional=True,
+        etag=f"{st.st_size:x}-{st.st_mtime_ns:x}",
+        last_modified=st.st_mtime,
+        max_age=DOWNLOAD_MAX_AGE,
+        **kwargs
+    )
+
+
 def format_size(path: Path) -> str:
     if path.is_dir():
         return "-"
@@ -208,9 +419,9 @@ def browse(path):
 @app.route("/download/<path:path>")
 def download(path):
     full = safe_path(path)
-    if not full.exists():
+    if not full.is_file():
         return "Not found", 404
-    return send_file(full, as_attachment=True)
+    return send_cached(full, as_attachment=True)
 
 
 @app.route("/delete/<path:path>")
@@ -240,6 +451,177 @@ def upload(path):
     return redirect(url_for("browse", path=path))
 
 
+# ---------------------------------------------------------------------
+# Resumable chunked uploads
+#
+#   POST   /uploads/start/<dir>     {"filename", "size", "chunk_size"?, "sha256"?}
+#   PUT    /uploads/<id>/<index>    raw chunk body, optional X-Chunk-SHA256
+#   GET    /uploads/<id>            received / missing chunks (for resume)
+#   POST   /uploads/<id>/complete   verify size (+ checksum), move into place
+#   DELETE /uploads/<id>            abort
+#
+# Chunks are written straight into a preallocated .part file at their
+# offset, so they may arrive in parallel and in any order.
+#
+# Integrity comes from the per-chunk X-Chunk-SHA256 header: a chunk whose
+# body does not match it is rejected and stays missing. The page's client
+# sends it for every chunk. Clients that know the whole file's hash may
+# pass "sha256" on start, and the assembled file is then checked as well.
+#
+# Sessions idle for UPLOAD_SESSION_TTL are removed when a new one starts.
+# ---------------------------------------------------------------------
+@app.route("/uploads/start/", defaults={"path": ""}, methods=["POST"])
+@app.route("/uploads/start/<path:path>", methods=["POST"])
+def upload_start(path):
+    data = request.get_json(silent=True) or {}
+    directory = safe_path(path)
+    filename = secure_filename(data.get("filename") or "")
+    size = data.get("size")
+    chunk_size = data.get("chunk_size") or DEFAULT_CHUNK_SIZE
+
+    if not filename:
+        return jsonify({"error": "filename is required"}), 400
+    if not isinstance(size, int) or size < 0:
+        return jsonify({"error": "size must be a non-negative integer"}), 400
+    if not isinstance(chunk_size, int) or not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        return jsonify({"error": f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}"}), 400
+    if not directory.is_dir():
+        return jsonify({"error": "Target directory not found"}), 404
+
+    _expire_uploads()
+
+    upload_id = uuid.uuid4().hex
+    rel_target = str(Path(path, filename))
+    target, part = _upload_paths(upload_id, rel_target)
+
+    # Preallocate so chunks can be written at any offset
+    with open(part, "wb") as f:
+        f.truncate(size)
+
+    state = {
+        "upload_id": upload_id,
+        "target": target,
+        "rel_target": rel_target,
+        "part": part,
+        "size": size,
+        "chunk_size": chunk_size,
+        "chunks": max(1, -(-size // chunk_size)),
+        "sha256": (data.get("sha256") or "").lower() or None,
+        "received": []
+    }
+    _save_upload(state)
+    return jsonify(_upload_status(state))
+
+
+@app.route("/uploads/<upload_id>", methods=["GET"])
+def upload_status(upload_id):
+    state = _load_upload(upload_id)
+    if state is None:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(_upload_status(state))
+
+
+@app.route("/uploads/<upload_id>/<int:index>", methods=["PUT"])
+def upload_chunk(upload_id, index):
+    state = _load_upload(upload_id)
+    if state is None:
+        return jsonify({"error": "Upload not found"}), 404
+    if not 0 <= index < state["chunks"]:
+        return jsonify({"error": "Chunk index out of range"}), 400
+
+    offset = index * state["chunk_size"]
+    expected = min(state["chunk_size"], state["size"] - offset)
+    digest = hashlib.sha256()
+    written = 0
+
+    # Stage the chunk and verify it before it touches the .part file, so a
+    # bad retry cannot overwrite a chunk that was already received
+    staged = f"{state['part']}.{index}.{uuid.uuid4().hex[:8]}"
+    try:
+        with open(staged, "wb") as f:
+            while written <= expected:
+                buf = request.stream.read(min(WRITE_BUFFER_SIZE, expected - written + 1))
+                if not buf:
+                    break
+                if written + len(buf) > expected:
+                    return jsonify({"error": f"Chunk larger than {expected} bytes"}), 400
+                f.write(buf)
+                digest.update(buf)
+                written += len(buf)
+
+        if written != expected:
+            return jsonify({"error": f"Chunk has {written} bytes, expected {expected}"}), 400
+
+        chunk_sha = request.headers.get("X-Chunk-SHA256")
+        if chunk_sha and chunk_sha.lower() != digest.hexdigest():
+            return jsonify({"error": "Chunk checksum mismatch"}), 400
+
+        fd = os.open(state["part"], os.O_WRONLY)
+        try:
+            with open(staged, "rb") as f:
+                for buf in iter(lambda: f.read(WRITE_BUFFER_SIZE), b""):
+                    os.pwrite(fd, buf, offset)
+                    offset += len(buf)
+        finally:
+            os.close(fd)
+    finally:
+        os.remove(staged)
+
+    with _upload_lock(upload_id):
+        state = _load_upload(upload_id)
+        if state is None:
+            return jsonify({"error": "Upload not found"}), 404
+        if index not in state["received"]:
+            state["received"].append(index)
+            _save_upload(state)
+
+    return jsonify({"status": "ok", "index": index, "received": len(state["received"])})
+
+
+@app.route("/uploads/<upload_id>/complete", methods=["POST"])
+def upload_complete(upload_id):
+    with _upload_lock(upload_id):
+        state = _load_upload(upload_id)
+        if state is None:
+            _drop_upload_lock(upload_id)
+            return jsonify({"error": "Upload not found"}), 404
+
+        status = _upload_status(state)
+        if status["missing"]:
+            return jsonify({"error": "Upload incomplete", **status}), 409
+
+        sha256 = None
+        if state["sha256"]:
+            digest = hashlib.sha256()
+            with open(state["part"], "rb") as f:
+                for buf in iter(lambda: f.read(WRITE_BUFFER_SIZE), b""):
+                    digest.update(buf)
+            sha256 = digest.hexdigest()
+
+            if state["sha256"] != sha256:
+                _discard_upload(state)
+                _drop_upload_lock(upload_id)
+                return jsonify({"error": "Checksum mismatch", "sha256": sha256}), 422
+
+        os.replace(state["part"], state["target"])
+        os.remove(_state_path(upload_id))
+
+    _drop_upload_lock(upload_id)
+    return jsonify({"status": "complete", "path": state["rel_target"], "sha256": sha256})
+
+
+@app.route("/uploads/<upload_id>", methods=["DELETE"])
+def upload_abort(upload_id):
+    with _upload_lock(upload_id):
+        state = _load_upload(upload_id)
+        if state is None:
+            _drop_upload_lock(upload_id)
+            return jsonify({"error": "Upload not found"}), 404
+        _discard_upload(state)
+    _drop_upload_lock(upload_id)
+    return jsonify({"status": "aborted"})
+
+
 @app.route("/edit/<path:path>", methods=["GET", "POST"])
 def edit_file(path):
     full = safe_path(path)
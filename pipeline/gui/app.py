@@ -1,6 +1,8 @@
-from flask import Flask, jsonify, request, send_from_directory, send_file
+from flask import Flask, Response, jsonify, request, send_from_directory, send_file, stream_with_context
 from flask_cors import CORS
 import os
+import json
+import math
 import logging
 
 # Import SpriteForge service modules
@@ -8,16 +10,80 @@ from services.hymotion import generate_motion
 from services.comfyui import generate_sprites
 from services.spritesheet import assemble_spritesheet
 from services.models import list_models, list_models_by_type
-from services.styles import load_style_presets, get_style_preset
-from services.workflows import list_workflows, load_workflow, save_workflow, validate_workflow
+from services.model_metadata import list_model_metadata, get_model_metadata
+from services.model_hashes import start_background_hasher, request_rescan, get_hash_status, find_duplicates
+from services.styles import load_style_presets, get_style_preset, save_style_preset
+from services.workflows import (
+    list_workflows, load_workflow_versioned, save_workflow, validate_workflow_graph,
+    patch_workflow, PatchError, VersionConflict, flush_all
+)
+from services.workflow_repair import repair_all
 from services.model_selection import load_selection, save_selection
 from services.batch import create_batch, run_batch_async, load_batch
 from services.prompts import load_templates, get_template, save_template
-from services.node_inspector import list_nodes, get_node_details
-from services.project import save_project, load_project, list_projects, prepare_project_for_gui
+from services.prompt_engine import validate_template
+from services.node_inspector import (
+    get_node_details, get_adjacency, query_nodes, query_index, get_document_index
+)
+from services.project_bundle import export_project, import_project, BundleError
+from services.validator import validate_all
+from services.file_index import start_file_indexer, iter_files, get_index_status
+from services.node_catalog import start_background_refresh, request_refresh, get_catalog_status
+from services.project import (
+    save_project, load_project, list_projects, list_project_summaries, prepare_project_for_gui,
+    list_versions, load_version, diff_versions, restore_version
+)
 from routes.health import health_bp
 
 
+# --------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------
+# Seconds browsers may reuse a preview before revalidating it via ETag
+PREVIEW_MAX_AGE = 60
+
+
+def _send_cached(path, mimetype):
+    """
+    send_file with a strong size+mtime ETag, Last-Modified, Range
+    requests (206 / 416), 304 Not Modified and Cache-Control headers.
+    """
+    st = os.stat(path)
+    return send_file(
+        path,
+        mimetype=mimetype,
+        conditional=True,
+        etag=f"{st.st_size:x}-{st.st_mtime_ns:x}",
+        last_modified=st.st_mtime,
+        max_age=PREVIEW_MAX_AGE
+    )
+
+
+PAGING_ARGS = ("offset", "limit", "fields", "bbox")
+
+
+def _paging_args(args):
+    """
+    Parse ?offset=&limit=&fields=a,b&bbox=x0,y0,x1,y1 for node queries.
+    Raises ValueError on malformed values.
+    """
+    limit = args.get("limit")
+    fields = args.get("fields")
+    bbox = args.get("bbox")
+
+    if bbox:
+        bbox = tuple(float(v) for v in bbox.split(","))
+        if len(bbox) != 4:
+            raise ValueError("bbox must be x0,y0,x1,y1")
+
+    return {
+        "offset": int(args.get("offset", 0)),
+        "limit": int(limit) if limit else None,
+        "fields": [f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        "bbox": bbox
+    }
+
+
 # --------------------------------------------------------------------------
 # Create Flask App
 # --------------------------------------------------------------------------
@@ -39,6 +105,15 @@ def create_app():
         format="%(asctime)s [%(levelname)s] %(message)s"
     )
 
+    # Background model hashing (duplicate detection)
+    start_background_hasher()
+
+    # Background ComfyUI node catalog refresh (offline workflow checks)
+    start_background_refresh()
+
+    # Background /workspace file index for the file browser
+    start_file_indexer()
+
     # ----------------------------------------------------------------------
     # HEALTH ENDPOINT
     # ----------------------------------------------------------------------
@@ -108,7 +183,7 @@ def create_app():
         path = request.args.get("path")
         if not path or not os.path.exists(path):
             return jsonify({"error": "Video not found"}), 404
-        return send_file(path, mimetype="video/mp4")
+        return _send_cached(path, "video/mp4")
 
     @app.get("/api/preview/frames")
     def preview_frames():
@@ -130,7 +205,7 @@ def create_app():
         path = request.args.get("path")
         if not path or not os.path.exists(path):
             return jsonify({"error": "Frame not found"}), 404
-        return send_file(path, mimetype="image/png")
+        return _send_cached(path, "image/png")
 
     # ----------------------------------------------------------------------
     # ComfyUI: Generate Sprite Frames
@@ -141,6 +216,7 @@ def create_app():
         character = data.get("character", "unnamed")
         frames_dir = data.get("frames_dir")
         style_id = data.get("style")
+        motion = data.get("motion")
 
         if not frames_dir:
             return jsonify({"status": "error", "message": "frames_dir is required"}), 400
@@ -156,7 +232,9 @@ def create_app():
             f"API sprite request: character={character}, frames={frames_dir}, style={style_id}"
         )
 
-        result = generate_sprites(frames_dir, character, style_data)
+        result = generate_sprites(
+            frames_dir, character, style_data, {"motion": motion, "style": style_id}
+        )
         return jsonify(result)
 
     # ----------------------------------------------------------------------
@@ -167,15 +245,36 @@ def create_app():
         data = request.json or {}
         character = data.get("character", "unnamed")
         frames_dir = data.get("frames_dir")
+        dedup = bool(data.get("dedup", False))
+        dedup_tolerance = data.get("dedup_tolerance", 0)
+        scales = data.get("scales") or []
+        resample = data.get("resample", "lanczos")
+        run_id = data.get("run_id")
+        palette_colors = data.get("palette_colors")
 
         if not frames_dir:
             return jsonify({"status": "error", "message": "frames_dir is required"}), 400
 
+        if not isinstance(scales, list) or not all(
+            isinstance(x, (int, float)) and not isinstance(x, bool) and math.isfinite(x) and 0 < x <= 1
+            for x in scales
+        ):
+            return jsonify({"status": "error", "message": "scales must be a list of numbers in (0, 1]"}), 400
+
+        if palette_colors is not None and not isinstance(palette_colors, int):
+            return jsonify({"status": "error", "message": "palette_colors must be an integer"}), 400
+
+        if not isinstance(dedup_tolerance, int) or not 0 <= dedup_tolerance <= 255:
+            return jsonify({"status": "error", "message": "dedup_tolerance must be an integer 0-255"}), 400
+
         logging.info(
-            f"API spritesheet request: character={character}, frames={frames_dir}"
+            f"API spritesheet request: character={character}, frames={frames_dir}, dedup={dedup}"
         )
 
-        result = assemble_spritesheet(frames_dir, character)
+        result = assemble_spritesheet(
+            frames_dir, character, dedup, dedup_tolerance, scales, resample, run_id,
+            palette_colors
+        )
         return jsonify(result)
 
     # ----------------------------------------------------------------------
@@ -186,7 +285,7 @@ def create_app():
         path = request.args.get("path")
         if not path or not os.path.exists(path):
             return jsonify({"error": "Sprite sheet not found"}), 404
-        return send_file(path, mimetype="image/png")
+        return _send_cached(path, "image/png")
 
     # ----------------------------------------------------------------------
     # Model Manager API
@@ -202,6 +301,33 @@ def create_app():
             return jsonify({"error": "Invalid model type"}), 400
         return jsonify({model_type: result})
 
+    @app.get("/api/models/metadata/<model_type>")
+    def models_metadata(model_type):
+        result = list_model_metadata(model_type)
+        if result is None:
+            return jsonify({"error": "Invalid model type"}), 400
+        return jsonify({model_type: result})
+
+    @app.get("/api/models/metadata/<model_type>/<path:filename>")
+    def models_metadata_one(model_type, filename):
+        result = get_model_metadata(model_type, filename)
+        if result is None:
+            return jsonify({"error": "Model not found"}), 404
+        return jsonify(result)
+
+    @app.get("/api/models/hashes")
+    def models_hashes():
+        return jsonify(get_hash_status())
+
+    @app.post("/api/models/hashes/scan")
+    def models_hashes_scan():
+        request_rescan()
+        return jsonify({"status": "scan requested"})
+
+    @app.get("/api/models/duplicates")
+    def models_duplicates():
+        return jsonify(find_duplicates())
+
     # ----------------------------------------------------------------------
     # Model Selector API
     # ----------------------------------------------------------------------
@@ -212,7 +338,7 @@ def create_app():
     @app.post("/api/models/active")
     def models_set_active():
         data = request.json or {}
-        current = load_selection()
+        current = load_selection().copy()
 
         for key in current:
             if key in data:
@@ -237,6 +363,13 @@ def create_app():
             return jsonify({"error": "Invalid style preset"}), 404
         return jsonify(preset)
 
+    @app.post("/api/styles/<style_id>")
+    def styles_save(style_id):
+        data = request.json or {}
+        if not save_style_preset(style_id, data):
+            return jsonify({"error": "Failed to save style preset"}), 500
+        return jsonify({"status": "saved", "style": style_id})
+
     # ----------------------------------------------------------------------
     # Workflow Editor API
     # ----------------------------------------------------------------------
@@ -246,10 +379,29 @@ def create_app():
 
     @app.get("/api/workflows/<name>")
     def workflows_load(name):
-        data = load_workflow(name)
+        data, version = load_workflow_versioned(name)
         if data is None:
             return jsonify({"error": "Workflow not found"}), 404
-        return jsonify(data)
+
+        # Progressive loading: a page of nodes plus the connections into them
+        if any(arg in request.args for arg in PAGING_ARGS):
+            index = get_document_index(name, data, version)
+            if index is None:
+                return jsonify({"error": "Invalid workflow"}), 400
+            try:
+                paging = _paging_args(request.args)
+                paging["fields"] = paging["fields"] or ["id", "type", "position", "inputs", "outputs"]
+                page = query_index(index, connections=True, **paging)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+            response = jsonify(page)
+            response.headers["X-Workflow-Version"] = str(version)
+            return response
+
+        response = jsonify(data)
+        response.headers["X-Workflow-Version"] = str(version)
+        return response
 
     @app.post("/api/workflows/<name>")
     def workflows_save(name):
@@ -257,24 +409,73 @@ def create_app():
         if not isinstance(data, dict):
             return jsonify({"error": "Invalid JSON"}), 400
 
-        save_workflow(name, data)
-        return jsonify({"status": "saved"})
+        version = save_workflow(name, data)
+        if version is None:
+            return jsonify({"error": "Failed to save workflow"}), 500
+        return jsonify({"status": "saved", "version": version})
+
+    @app.patch("/api/workflows/<name>")
+    def workflows_patch(name):
+        data = request.json or {}
+        try:
+            version = patch_workflow(name, data.get("ops"), data.get("version"))
+        except VersionConflict as e:
+            return jsonify({"error": "Version conflict", "version": e.version}), 409
+        except PatchError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if version is None:
+            return jsonify({"error": "Workflow not found"}), 404
+        return jsonify({"status": "patched", "version": version})
 
     @app.post("/api/workflows/validate")
     def workflows_validate():
         data = request.json
-        ok, msg = validate_workflow(data)
-        return jsonify({"valid": ok, "message": msg})
+        ok, msg, report = validate_workflow_graph(data)
+        return jsonify({"valid": ok, "message": msg, "graph": report})
+
+    @app.post("/api/workflows/repair")
+    def workflows_repair():
+        data = request.json or {}
+        files = data.get("files")
+        if files is not None and not isinstance(files, list):
+            return jsonify({"error": "files must be a list"}), 400
+
+        # Write out pending editor patches so repairs see the latest graphs
+        flush_all()
+        return jsonify(repair_all(dry_run=bool(data.get("dry_run", True)), names=files))
+
+    # ----------------------------------------------------------------------
+    # Pipeline Validation API
+    # ----------------------------------------------------------------------
+    @app.get("/api/validate")
+    def validate_pipeline():
+        # The validator reads files, so write out pending editor patches first
+        flush_all()
+        return jsonify(validate_all("/workspace/pipeline/workflows"))
+
+    @app.get("/api/nodes/catalog")
+    def node_catalog_status():
+        return jsonify(get_catalog_status())
+
+    @app.post("/api/nodes/catalog/refresh")
+    def node_catalog_refresh():
+        request_refresh()
+        return jsonify({"status": "refresh requested"})
 
     # ----------------------------------------------------------------------
     # Workflow Node Inspector API
     # ----------------------------------------------------------------------
     @app.get("/api/workflows/nodes/<workflow_name>")
     def workflow_nodes(workflow_name):
-        nodes = list_nodes(workflow_name)
-        if nodes is None:
+        try:
+            result = query_nodes(workflow_name, **_paging_args(request.args))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if result is None:
             return jsonify({"error": "Workflow not found"}), 404
-        return jsonify({"nodes": nodes})
+        return jsonify(result)
 
     @app.get("/api/workflows/node/<workflow_name>/<node_id>")
     def workflow_node_details(workflow_name, node_id):
@@ -283,6 +484,13 @@ def create_app():
             return jsonify({"error": "Node not found"}), 404
         return jsonify(details)
 
+    @app.get("/api/workflows/graph/<workflow_name>")
+    def workflow_graph(workflow_name):
+        graph = get_adjacency(workflow_name)
+        if graph is None:
+            return jsonify({"error": "Workflow not found"}), 404
+        return jsonify(graph)
+
     # ----------------------------------------------------------------------
     # Batch Generation API
     # ----------------------------------------------------------------------
@@ -328,7 +536,12 @@ def create_app():
     @app.post("/api/prompts/<template_id>")
     def prompts_save(template_id):
         data = request.json or {}
-        save_template(template_id, data)
+        errors = validate_template(data)
+        if errors:
+            return jsonify({"error": "Invalid template", "details": errors}), 400
+
+        if not save_template(template_id, data):
+            return jsonify({"error": "Failed to save template"}), 500
         return jsonify({"status": "saved", "template": template_id})
 
     # ----------------------------------------------------------------------
@@ -352,20 +565,110 @@ def create_app():
     def project_list():
         return jsonify(list_projects())
 
+    @app.get("/api/project/summaries")
+    def project_summaries():
+        try:
+            limit = request.args.get("limit")
+            result = list_project_summaries(
+                sort=request.args.get("sort", "last_modified"),
+                descending=request.args.get("order", "desc") != "asc",
+                offset=int(request.args.get("offset", 0)),
+                limit=int(limit) if limit else None
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(result)
+
+    @app.get("/api/project/<project_id>/versions")
+    def project_versions(project_id):
+        versions = list_versions(project_id)
+        if versions is None:
+            return jsonify({"error": "Project has no versions"}), 404
+        return jsonify({"project_id": project_id, "versions": versions})
+
+    @app.get("/api/project/<project_id>/versions/<int:version>")
+    def project_version_load(project_id, version):
+        project = load_version(project_id, version)
+        if project is None:
+            return jsonify({"error": "Version not found"}), 404
+        return jsonify(prepare_project_for_gui(project))
+
+    @app.get("/api/project/<project_id>/diff")
+    def project_diff(project_id):
+        try:
+            old = int(request.args["from"])
+            new = int(request.args["to"])
+        except (KeyError, ValueError):
+            return jsonify({"error": "from and to versions are required"}), 400
+
+        diff = diff_versions(project_id, old, new)
+        if diff is None:
+            return jsonify({"error": "Version not found"}), 404
+        return jsonify(diff)
+
+    @app.get("/api/project/export/<project_id>")
+    def project_export(project_id):
+        compression = request.args.get("compression") or None
+        try:
+            stream = export_project(project_id, compression)
+        except BundleError as e:
+            return jsonify({"error": str(e)}), 400
+        if stream is None:
+            return jsonify({"error": "Project not found"}), 404
+
+        filename = f"{project_id}.tar" + (".zst" if compression == "zstd" else "")
+        return Response(
+            stream_with_context(stream),
+            mimetype="application/zstd" if compression == "zstd" else "application/x-tar",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    @app.post("/api/project/import")
+    def project_import():
+        # The bundle is the raw request body, read as a stream
+        try:
+            result = import_project(request.stream, overwrite=request.args.get("overwrite") == "1")
+        except BundleError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"status": "imported", **result})
+
+    @app.post("/api/project/<project_id>/restore/<int:version>")
+    def project_restore(project_id, version):
+        project = restore_version(project_id, version)
+        if project is None:
+            return jsonify({"error": "Version not found"}), 404
+        return jsonify({"status": "restored", "version": project["version"]})
+
     # ----------------------------------------------------------------------
     # File Browser API
     # ----------------------------------------------------------------------
     @app.get("/api/files/list")
     def list_files():
-        root = "/workspace"
-        files = []
-
-        for dirpath, dirnames, filenames in os.walk(root):
-            for f in filenames:
-                full = os.path.join(dirpath, f)
-                files.append(full.replace(root, ""))
-
-        return jsonify({"files": files})
+        try:
+            limit = request.args.get("limit")
+            depth = request.args.get("depth")
+            paths, next_cursor = iter_files(
+                prefix=request.args.get("prefix", ""),
+                pattern=request.args.get("glob") or None,
+                max_depth=int(depth) if depth else None,
+                cursor=request.args.get("cursor") or None,
+                limit=int(limit) if limit else None
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Stream the listing instead of building one giant JSON document
+        def generate():
+            yield '{"files": ['
+            for i, path in enumerate(paths):
+                yield ("," if i else "") + json.dumps(path)
+            yield '], "next_cursor": ' + json.dumps(next_cursor()) + "}"
+
+        return Response(stream_with_context(generate()), mimetype="application/json")
+
+    @app.get("/api/files/index")
+    def file_index_status():
+        return jsonify(get_index_status())
 
     return app
 
@@ -177,7 +177,12 @@ def run_job(batch_id: str, job: dict):
     # --------------------------------------------------------------
     # 3. Sprite frames
     # --------------------------------------------------------------
-    sprite_result = generate_sprites(frames_dir, job["character"], style_data)
+    sprite_result = generate_sprites(
+        frames_dir,
+        job["character"],
+        style_data,
+        {"motion": job["motion"], "style": job["style"]}
+    )
     if not sprite_result or sprite_result.get("status") != "success":
         job["status"] = "failed"
         job["error"] = "Sprite generation failed"
@@ -1,10 +1,15 @@
 import os
+import re
 import uuid
 import time
-import json
 import logging
 import requests
 
+from services.workflow_format import load_compiled
+from services.workflows import flush_workflow
+from services.node_catalog import check_workflow
+from services.preflight import preflight_models
+
 COMFYUI_URL = "http://127.0.0.1:8188"
 WORKFLOW_DIR = "/workspace/pipeline/workflows"
 SPRITE_OUTPUT_ROOT = "/workspace/sprites"
@@ -50,16 +55,54 @@ def wait_for_result(prompt_id: str, timeout=300):
     return None
 
 
+# ------------------------------------------------------------------------------
+# Placeholder substitution
+# ------------------------------------------------------------------------------
+def substitute_placeholders(value, replacements: dict):
+    """
+    Return a copy of an API-format workflow with @placeholders filled in.
+
+    A string that is exactly one placeholder takes the raw value (so
+    numbers stay numbers); placeholders inside longer strings are replaced
+    with their string form. None values become "".
+    """
+    pattern = re.compile("|".join(
+        re.escape(k) for k in sorted(replacements, key=len, reverse=True)
+    ))
+
+    def text(match):
+        v = replacements[match.group(0)]
+        return "" if v is None else str(v)
+
+    def walk(v):
+        if isinstance(v, str):
+            if v in replacements:
+                raw = replacements[v]
+                return "" if raw is None else raw
+            return pattern.sub(text, v) if "@" in v else v
+        if isinstance(v, dict):
+            return {k: walk(x) for k, x in v.items()}
+        if isinstance(v, (list, tuple)):
+            return [walk(x) for x in v]
+        return v
+
+    return walk(value)
+
+
 # ------------------------------------------------------------------------------
 # Main SpriteForge → ComfyUI integration
 # ------------------------------------------------------------------------------
-def generate_sprites(frames_dir: str, character_name: str, style: dict):
+def generate_sprites(frames_dir: str, character_name: str, style: dict, variables: dict | None = None):
     """
     Runs a ComfyUI workflow that takes HY-Motion frames and generates sprites.
     Returns output directory + workflow results.
+
+    `variables` supplies extra prompt template values (e.g. motion, style);
+    character and the merged model/style fields are always available.
     """
     from services.model_selection import load_selection
     from services.prompts import get_template
+    from services.prompt_engine import render_template
 
     run_id = str(uuid.uuid4())[:8]
     output_dir = os.path.join(SPRITE_OUTPUT_ROOT, run_id)
@@ -79,23 +122,23 @@ def generate_sprites(frames_dir: str, character_name: str, style: dict):
     template_id = merged.get("prompt_template")
     template = get_template(template_id) if template_id else None
 
-    prompt = template.get("prompt") if template else ""
-    negative_prompt = template.get("negative_prompt") if template else ""
+    template_vars = {**merged, **(variables or {}), "character": character_name}
+    prompt, negative_prompt = render_template(template, template_vars) if template else ("", "")
 
     # ----------------------------------------------------------------------
-    # Load workflow JSON
+    # Load workflow (compiled to API format once per content change)
     # ----------------------------------------------------------------------
     workflow_path = os.path.join(WORKFLOW_DIR, "sprite_workflow.json")
 
-    if not os.path.exists(workflow_path):
+    # Pending editor patches must reach the file before it is compiled
+    flush_workflow("sprite_workflow.json")
+    compiled = load_compiled(workflow_path)
+    if compiled is None:
         return {
             "status": "error",
-            "message": f"Missing workflow file: {workflow_path}"
+            "message": f"Missing or invalid workflow file: {workflow_path}"
         }
 
-    with open(workflow_path, "r") as f:
-        workflow_str = f.read()
-
     # ----------------------------------------------------------------------
     # Inject variables
     # ----------------------------------------------------------------------
@@ -109,15 +152,32 @@ def generate_sprites(frames_dir: str, character_name: str, style: dict):
         "@controlnet": merged.get("controlnet", ""),
         "@ipadapter": merged.get("ipadapter", ""),
         "@sampler": merged.get("sampler", "euler"),
-        "@cfg_scale": str(merged.get("cfg_scale", 1.0)),
+        "@cfg_scale": merged.get("cfg_scale", 1.0),
         "@prompt": prompt,
         "@negative_prompt": negative_prompt
     }
 
-    for key, value in replacements.items():
-        workflow_str = workflow_str.replace(key, value)
+    # Fail fast on missing models instead of waiting for a ComfyUI timeout
+    model_errors = preflight_models(compiled, replacements)
+    if model_errors:
+        logging.error(f"[ComfyUI] Model preflight failed: {model_errors[0]}")
+        return {
+            "status": "error",
+            "message": model_errors[0],
+            "errors": model_errors
+        }
+
+    workflow = substitute_placeholders(compiled, replacements)
 
-    workflow = json.loads(workflow_str)
+    # Catch unknown nodes/inputs and invalid enum values before queueing
+    catalog_errors = check_workflow(workflow)
+    if catalog_errors:
+        logging.error(f"[ComfyUI] Workflow failed node catalog checks: {catalog_errors[0]}")
+        return {
+            "status": "error",
+            "message": "Workflow failed node catalog checks",
+            "errors": catalog_errors
+        }
 
     # ----------------------------------------------------------------------
     # Prepare inputs for ComfyUI
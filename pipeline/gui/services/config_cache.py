@@ -0,0 +1,102 @@
+import os
+import json
+import logging
+import threading
+
+
+class FrozenDict(dict):
+    """
+    A read-only dict handed out by the config cache.
+    It still serializes like a dict; use .copy() or dict(...) to get a
+    mutable copy, or copy.deepcopy() for a fully mutable deep copy.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Cached config is read-only; copy it before modifying")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        # Rebuild through dict.__init__, not the blocked __setitem__
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value):
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Inverse of freeze: plain, mutable dicts and lists all the way down."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+# { path: ((mtime_ns, size), frozen_value) }
+_ENTRIES = {}
+_LOCK = threading.Lock()
+
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_cached(path: str, build, default, label: str = "Config"):
+    """
+    Return the normalized, frozen contents of a JSON config file.
+
+    `build(raw)` turns the parsed JSON into its normalized form and runs
+    only when the file's mtime or size changed since the last load.
+    `default` is returned (frozen) when the file is missing or invalid.
+    """
+    stamp = _stamp(path)
+
+    with _LOCK:
+        entry = _ENTRIES.get(path)
+        if entry and entry[0] == stamp:
+            return entry[1]
+
+    if stamp is None:
+        logging.warning(f"[{label}] File not found: {path}")
+        value = freeze(default)
+    else:
+        try:
+            with open(path, "r") as f:
+                raw = json.load(f)
+            value = freeze(build(raw))
+            logging.info(f"[{label}] Loaded {os.path.basename(path)}")
+        except Exception as e:
+            logging.error(f"[{label}] Failed to load {path}: {e}")
+            value = freeze(default)
+
+    with _LOCK:
+        _ENTRIES[path] = (stamp, value)
+
+    return value
+
+
+def invalidate(path: str):
+    """Forget the cached copy of a file, e.g. right after writing it."""
+    with _LOCK:
+        _ENTRIES.pop(path, None)
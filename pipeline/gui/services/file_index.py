@@ -0,0 +1,189 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from fnmatch import fnmatchcase
+
+FILE_INDEX_ROOT = "/workspace"
+
+# Directory names never descended into
+EXCLUDED_DIRS = {"node_modules", ".git", "__pycache__", ".cache"}
+
+# Seconds between background refreshes
+FILE_INDEX_INTERVAL = 30
+
+# Per-directory listings: { rel_dir: {"mtime": ns, "files": [...], "dirs": [...]} }
+# rel_dir is "" for the root and "/a/b" below it.
+_DIRS = {}
+# Sorted tuple of every indexed file path ("/a/b/c.txt"), swapped atomically
+_PATHS = ()
+_LOCK = threading.Lock()
+_READY = threading.Event()
+_WAKE = threading.Event()
+_THREAD = None
+_STATUS = {"files": 0, "dirs": 0, "rescanned": 0, "last_refresh": None, "refresh_ms": None}
+
+
+# ----------------------------------------------------------------------
+# Index maintenance
+# ----------------------------------------------------------------------
+def _list_dir(path: str):
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in EXCLUDED_DIRS:
+                            dirs.append(entry.name)
+                    elif entry.is_file():
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError as e:
+        logging.warning(f"[FileIndex] Cannot list {path}: {e}")
+    return sorted(files), sorted(dirs)
+
+
+def refresh_index():
+    """
+    Bring the index up to date. Every directory is stat'ed, but only
+    directories whose mtime changed (an entry was added, removed or
+    renamed) are listed again.
+    """
+    global _DIRS, _PATHS
+    start = time.perf_counter()
+
+    new_dirs = {}
+    rescanned = 0
+    stack = [""]
+
+    while stack:
+        rel = stack.pop()
+        path = FILE_INDEX_ROOT + rel
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+
+        entry = _DIRS.get(rel)
+        if entry is None or entry["mtime"] != mtime:
+            files, dirs = _list_dir(path)
+            entry = {"mtime": mtime, "files": files, "dirs": dirs}
+            rescanned += 1
+
+        new_dirs[rel] = entry
+        stack.extend(f"{rel}/{d}" for d in entry["dirs"])
+
+    paths = sorted(
+        f"{rel}/{name}"
+        for rel, entry in new_dirs.items()
+        for name in entry["files"]
+    )
+
+    with _LOCK:
+        _DIRS = new_dirs
+        _PATHS = tuple(paths)
+
+    elapsed = round((time.perf_counter() - start) * 1000, 1)
+    _STATUS.update({
+        "files": len(paths),
+        "dirs": len(new_dirs),
+        "rescanned": rescanned,
+        "last_refresh": time.time(),
+        "refresh_ms": elapsed
+    })
+    _READY.set()
+
+    if rescanned:
+        logging.info(f"[FileIndex] {len(paths)} files, {rescanned} of {len(new_dirs)} dirs rescanned in {elapsed} ms")
+
+
+def _index_loop():
+    while True:
+        try:
+            refresh_index()
+        except Exception as e:
+            logging.error(f"[FileIndex] Refresh failed: {e}")
+            _READY.set()
+
+        _WAKE.wait(FILE_INDEX_INTERVAL)
+        _WAKE.clear()
+
+
+def start_file_indexer():
+    """Start the background file indexer once per process."""
+    global _THREAD
+    if _THREAD is not None and _THREAD.is_alive():
+        return
+
+    _THREAD = threading.Thread(target=_index_loop, daemon=True, name="FileIndex")
+    _THREAD.start()
+    logging.info("[FileIndex] Background indexer started")
+
+
+def request_refresh():
+    """Wake the indexer, e.g. after the app wrote files."""
+    _WAKE.set()
+
+
+def get_index_status():
+    return dict(_STATUS)
+
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+def iter_files(prefix: str = "", pattern=None, max_depth=None, cursor=None, limit=None):
+    """
+    Return (paths, next_cursor) for a page of indexed files.
+
+    `paths` is a lazy iterator over the sorted index:
+      - prefix: only paths starting with it (e.g. "/models/loras/")
+      - pattern: glob matched against the file name, or the whole path
+        when it contains "/"
+      - max_depth: directory levels below the prefix's folder (0 = only
+        files directly inside it)
+      - cursor: continue after this path (the previous next_cursor)
+      - limit: page size; None returns everything
+    `next_cursor` is a callable returning the cursor for the next page,
+    or None when the listing is complete, once `paths` is exhausted.
+    """
+    if not _READY.is_set():
+        start_file_indexer()
+        _READY.wait()
+
+    with _LOCK:
+        paths = _PATHS
+
+    if prefix and not prefix.startswith("/"):
+        prefix = "/" + prefix
+
+    lo = bisect.bisect_left(paths, prefix)
+    if cursor:
+        lo = max(lo, bisect.bisect_right(paths, cursor))
+
+    base_depth = prefix.rsplit("/", 1)[0].count("/")
+    state = {"next": None}
+
+    def generate():
+        count = 0
+        last = None
+        for i in range(lo, len(paths)):
+            path = paths[i]
+            if not path.startswith(prefix):
+                break
+            if max_depth is not None and path.count("/") - base_depth - 1 > max_depth:
+                continue
+            if pattern and not fnmatchcase(path if "/" in pattern else path.rsplit("/", 1)[1], pattern):
+                continue
+
+            if limit is not None and count >= limit:
+                state["next"] = last
+                return
+            count += 1
+            last = path
+            yield path
+
+    return generate(), lambda: state["next"]
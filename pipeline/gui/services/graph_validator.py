@@ -0,0 +1,215 @@
+from collections import deque
+
+# Node types that terminate a workflow; everything else must feed one
+OUTPUT_NODE_TYPES = {
+    "SaveImage",
+    "PreviewImage",
+    "SaveAnimatedWEBP",
+    "SaveAnimatedPNG",
+    "VHS_VideoCombine"
+}
+
+
+def is_output_node(node_type):
+    return bool(node_type) and (node_type in OUTPUT_NODE_TYPES or node_type.startswith("Save"))
+
+
+def _is_link(value):
+    """A [node_id, slot] input value, whether or not the node exists."""
+    return (
+        isinstance(value, (list, tuple))
+        and len(value) == 2
+        and isinstance(value[1], int)
+        and isinstance(value[0], (str, int))
+        and not isinstance(value[0], bool)
+    )
+
+
+def _slot_name(node, slot, required=()):
+    """
+    Input name a connection's destination slot refers to: names are used
+    as-is, integer slots index the node's inputs by position (as in
+    workflow_format.ui_to_api), followed by any required inputs the node
+    does not list. None if the slot cannot be resolved.
+    """
+    if isinstance(slot, str):
+        return slot
+    if not isinstance(slot, int) or isinstance(slot, bool) or slot < 0:
+        return None
+
+    inputs = node.get("inputs")
+    names = list(inputs) if isinstance(inputs, dict) else []
+    names += [name for name in required if name not in names]
+    return names[slot] if slot < len(names) else None
+
+
+def _find_cycle(remaining, preds):
+    """
+    Walk predecessor edges inside the nodes Kahn's algorithm could not
+    order until a node repeats; the repeated stretch is a cycle.
+    """
+    start = next(iter(remaining))
+    seen = {}
+    path = []
+    node = start
+
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(p for p in preds[node] if p in remaining)
+
+    cycle = path[seen[node]:]
+    cycle.reverse()
+    return cycle + [cycle[0]]
+
+
+def analyze_graph(data: dict, required_inputs=None):
+    """
+    Validate a workflow graph in a single O(V+E) pass.
+
+    Reports duplicate node IDs, connections and inline links to missing
+    nodes, unconnected required inputs, cycles (with the offending path) and nodes that
+    cannot reach any output node, and returns a topological execution
+    order when the graph is acyclic.
+
+    `required_inputs(node_type)` may return the input names a node type
+    must have; without it only inputs explicitly set to null count.
+    """
+    errors = []
+    warnings = []
+
+    nodes = data.get("nodes", [])
+    connections = data.get("connections", [])
+
+    # ------------------------------------------------------------------
+    # Nodes
+    # ------------------------------------------------------------------
+    by_id = {}
+    duplicate_ids = []
+    for node in nodes:
+        nid = str(node.get("id"))
+        if nid in by_id:
+            duplicate_ids.append(nid)
+            continue
+        by_id[nid] = node
+
+    for nid in duplicate_ids:
+        errors.append(f"Duplicate node id {nid}")
+
+    succs = {nid: [] for nid in by_id}
+    preds = {nid: [] for nid in by_id}
+    fed_inputs = {nid: set() for nid in by_id}
+
+    def add_edge(src, dst):
+        succs[src].append(dst)
+        preds[dst].append(src)
+
+    # ------------------------------------------------------------------
+    # Edges from the connection list
+    # ------------------------------------------------------------------
+    for conn in connections:
+        if not isinstance(conn, (list, tuple)) or len(conn) < 4:
+            errors.append(f"Invalid connection format: {conn}")
+            continue
+
+        src, _, dst, dst_in = conn[:4]
+        src, dst = str(src), str(dst)
+
+        if src not in by_id:
+            errors.append(f"Connection references missing source node {src}")
+            continue
+        if dst not in by_id:
+            errors.append(f"Connection references missing destination node {dst}")
+            continue
+
+        add_edge(src, dst)
+        node = by_id[dst]
+        required = ()
+        if required_inputs and isinstance(dst_in, int):
+            required = required_inputs(node.get("type") or node.get("class_type")) or ()
+        name = _slot_name(node, dst_in, required)
+        if name is not None:
+            fed_inputs[dst].add(name)
+
+    # ------------------------------------------------------------------
+    # Edges and unconnected inputs from node input values
+    # ------------------------------------------------------------------
+    unconnected = []
+    for nid, node in by_id.items():
+        inputs = node.get("inputs") or {}
+        if not isinstance(inputs, dict):
+            continue
+
+        for name, value in inputs.items():
+            if _is_link(value):
+                if str(value[0]) not in by_id:
+                    unconnected.append({"node": nid, "input": name})
+                    errors.append(f"Node {nid} input '{name}' links to missing node {value[0]}")
+                    continue
+                add_edge(str(value[0]), nid)
+                fed_inputs[nid].add(name)
+            elif value is None and name not in fed_inputs[nid]:
+                unconnected.append({"node": nid, "input": name})
+                errors.append(f"Node {nid} input '{name}' is not connected")
+
+        if required_inputs:
+            for name in required_inputs(node.get("type") or node.get("class_type")) or ():
+                if name not in inputs and name not in fed_inputs[nid]:
+                    unconnected.append({"node": nid, "input": name})
+                    errors.append(f"Node {nid} is missing required input '{name}'")
+
+    # ------------------------------------------------------------------
+    # Topological order (Kahn) + cycle detection
+    # ------------------------------------------------------------------
+    indegree = {nid: len(preds[nid]) for nid in by_id}
+    queue = deque(nid for nid in by_id if indegree[nid] == 0)
+    order = []
+
+    while queue:
+        nid = queue.popleft()
+        order.append(nid)
+        for nxt in succs[nid]:
+            indegree[nxt] -= 1
+            if indegree[nxt] == 0:
+                queue.append(nxt)
+
+    cycle = None
+    if len(order) != len(by_id):
+        remaining = {nid for nid in by_id if indegree[nid] > 0}
+        cycle = _find_cycle(remaining, preds)
+        errors.append(f"Cycle detected: {' -> '.join(cycle)}")
+        order = None
+
+    # ------------------------------------------------------------------
+    # Reachability: every node should feed at least one output node
+    # ------------------------------------------------------------------
+    outputs = [nid for nid, node in by_id.items()
+               if is_output_node(node.get("type") or node.get("class_type"))]
+
+    unreachable = []
+    if not outputs:
+        if by_id:
+            warnings.append("Workflow has no output nodes")
+    else:
+        seen = set(outputs)
+        stack = list(outputs)
+        while stack:
+            for p in preds[stack.pop()]:
+                if p not in seen:
+                    seen.add(p)
+                    stack.append(p)
+
+        unreachable = [nid for nid in by_id if nid not in seen]
+        for nid in unreachable:
+            warnings.append(f"Node {nid} does not contribute to any output")
+
+    return {
+        "valid": not errors,
+        "errors": errors,
+        "warnings": warnings,
+        "duplicate_ids": duplicate_ids,
+        "cycle": cycle,
+        "unreachable": unreachable,
+        "unconnected_inputs": unconnected,
+        "order": order
+    }
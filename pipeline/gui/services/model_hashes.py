@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from services.models import MODEL_ROOT, MODEL_TYPES, get_model_entries
+
+HASH_INDEX_PATH = os.path.join(MODEL_ROOT, ".spriteforge_hashes.json")
+
+# Seconds between background rescans of MODEL_ROOT
+RESCAN_INTERVAL = 600
+
+# Streaming read size and pause between chunks; the pause keeps the
+# hasher from saturating a shared network volume
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+HASH_CHUNK_PAUSE = 0.002
+
+# Length of the short AutoV2-style hash (prefix of the full SHA-256)
+SHORT_HASH_LENGTH = 10
+
+# { rel_path: {"size", "mtime", "sha256", "autov2"} }
+_HASHES = None
+_HASHES_LOCK = threading.Lock()
+
+_STATUS = {"running": False, "current": None, "hashed": 0, "last_scan": None}
+_WAKE = threading.Event()
+_THREAD = None
+
+
+# ----------------------------------------------------------------------
+# Persistence
+# ----------------------------------------------------------------------
+def _atomic_write(path: str, data: dict):
+    """Write JSON atomically to avoid corruption."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _load_hashes():
+    """Load the persisted hash index once per process. Must hold _HASHES_LOCK."""
+    global _HASHES
+    if _HASHES is not None:
+        return _HASHES
+
+    _HASHES = {}
+    if os.path.exists(HASH_INDEX_PATH):
+        try:
+            with open(HASH_INDEX_PATH, "r") as f:
+                _HASHES = json.load(f)
+        except Exception as e:
+            logging.error(f"[ModelHashes] Failed to load hash index {HASH_INDEX_PATH}: {e}")
+
+    return _HASHES
+
+
+def _save_hashes():
+    """Persist the hash index. Must hold _HASHES_LOCK."""
+    try:
+        _atomic_write(HASH_INDEX_PATH, _HASHES)
+    except Exception as e:
+        logging.error(f"[ModelHashes] Failed to save hash index {HASH_INDEX_PATH}: {e}")
+
+
+# ----------------------------------------------------------------------
+# Hashing
+# ----------------------------------------------------------------------
+def _lower_io_priority():
+    """
+    Put the hasher thread in the idle I/O class (and lowest CPU priority)
+    where the platform allows it. Best effort only.
+    """
+    try:
+        import psutil
+        proc = psutil.Process(threading.get_native_id())
+        if hasattr(psutil, "IOPRIO_CLASS_IDLE"):
+            proc.ionice(psutil.IOPRIO_CLASS_IDLE)
+        proc.nice(19)
+    except Exception as e:
+        logging.info(f"[ModelHashes] Could not lower hasher priority: {e}")
+
+
+def hash_file(path: str):
+    """Streaming SHA-256 of a file. Returns (sha256, autov2)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+            if HASH_CHUNK_PAUSE:
+                time.sleep(HASH_CHUNK_PAUSE)
+
+    digest = h.hexdigest()
+    return digest, digest[:SHORT_HASH_LENGTH].upper()
+
+
+def scan_models():
+    """
+    Hash every model under MODEL_ROOT whose size or mtime changed since
+    the last scan. Entries for deleted files are dropped. Returns the
+    number of files hashed.
+    """
+    seen = set()
+    hashed = 0
+
+    for model_type, folder in MODEL_TYPES.items():
+        for name in sorted(get_model_entries(model_type) or {}):
+            rel_path = os.path.join(folder, name)
+            full_path = os.path.join(MODEL_ROOT, rel_path)
+            seen.add(rel_path)
+
+            try:
+                st = os.stat(full_path)
+            except FileNotFoundError:
+                continue
+
+            with _HASHES_LOCK:
+                known = _load_hashes().get(rel_path)
+            if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime:
+                continue
+
+            _STATUS["current"] = rel_path
+            try:
+                sha256, autov2 = hash_file(full_path)
+            except Exception as e:
+                logging.error(f"[ModelHashes] Failed to hash {full_path}: {e}")
+                continue
+
+            # Persist after every file so a restart never loses finished work
+            with _HASHES_LOCK:
+                _load_hashes()[rel_path] = {
+                    "size": st.st_size,
+                    "mtime": st.st_mtime,
+                    "sha256": sha256,
+                    "autov2": autov2
+                }
+                _save_hashes()
+
+            hashed += 1
+            _STATUS["hashed"] += 1
+            logging.info(f"[ModelHashes] Hashed {rel_path}: {autov2}")
+
+    with _HASHES_LOCK:
+        hashes = _load_hashes()
+        stale = [p for p in hashes if p not in seen]
+        for p in stale:
+            del hashes[p]
+        if stale:
+            _save_hashes()
+
+    _STATUS["current"] = None
+    _STATUS["last_scan"] = time.time()
+    return hashed
+
+
+# ----------------------------------------------------------------------
+# Background worker
+# ----------------------------------------------------------------------
+def _hasher_loop():
+    _lower_io_priority()
+
+    while True:
+        _STATUS["running"] = True
+        try:
+            count = scan_models()
+            logging.info(f"[ModelHashes] Scan complete, {count} files hashed")
+        except Exception as e:
+            logging.error(f"[ModelHashes] Scan failed: {e}")
+        finally:
+            _STATUS["running"] = False
+            _STATUS["current"] = None
+
+        _WAKE.wait(RESCAN_INTERVAL)
+        _WAKE.clear()
+
+
+def start_background_hasher():
+    """Start the background hasher thread once per process."""
+    global _THREAD
+    if _THREAD is not None and _THREAD.is_alive():
+        return
+
+    _THREAD = threading.Thread(target=_hasher_loop, daemon=True, name="ModelHasher")
+    _THREAD.start()
+    logging.info("[ModelHashes] Background hasher started")
+
+
+def request_rescan():
+    """Wake the background hasher for an immediate rescan."""
+    _WAKE.set()
+
+
+# ----------------------------------------------------------------------
+# Reports
+# ----------------------------------------------------------------------
+def get_hash_status():
+    """Current hasher progress plus all known hashes."""
+    with _HASHES_LOCK:
+        hashes = {p: dict(v) for p, v in _load_hashes().items()}
+
+    return {**_STATUS, "files": hashes}
+
+
+def find_duplicates():
+    """
+    Group models by SHA-256. Returns duplicate groups (largest waste
+    first) and the total bytes that could be reclaimed.
+    """
+    with _HASHES_LOCK:
+        hashes = list(_load_hashes().items())
+
+    groups = {}
+    for rel_path, info in hashes:
+        groups.setdefault(info["sha256"], []).append((rel_path, info["size"]))
+
+    duplicates = []
+    for sha256, files in groups.items():
+        if len(files) < 2:
+            continue
+        size = files[0][1]
+        duplicates.append({
+            "sha256": sha256,
+            "autov2": sha256[:SHORT_HASH_LENGTH].upper(),
+            "size": size,
+            "files": sorted(p for p, _ in files),
+            "wasted_bytes": size * (len(files) - 1)
+        })
+
+    duplicates.sort(key=lambda d: d["wasted_bytes"], reverse=True)
+
+    return {
+        "duplicates": duplicates,
+        "wasted_bytes": sum(d["wasted_bytes"] for d in duplicates),
+        "scan_running": _STATUS["running"]
+    }
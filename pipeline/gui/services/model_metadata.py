@@ -0,0 +1,221 @@
+import os
+import json
+import mmap
+import struct
+import logging
+import threading
+from math import prod
+
+from services.models import MODEL_ROOT, MODEL_TYPES, get_model_entries
+
+SIDECAR_PATH = os.path.join(MODEL_ROOT, ".spriteforge_metadata.json")
+
+# Refuse absurd header sizes (corrupt or non-safetensors files)
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+
+# Long embedded training metadata values (tag frequencies, dataset dirs)
+# are truncated to keep the sidecar and API responses small
+METADATA_VALUE_LIMIT = 2048
+
+# Tensor key prefixes -> architecture, checked in order
+ARCHITECTURE_HINTS = [
+    ("double_blocks.", "flux"),
+    ("model.diffusion_model.double_blocks.", "flux"),
+    ("model.diffusion_model.joint_blocks.", "sd3"),
+    ("conditioner.embedders.1.model.", "sdxl"),
+    ("conditioner.embedders.0.model.", "sdxl_refiner"),
+    ("cond_stage_model.model.", "sd2"),
+    ("cond_stage_model.transformer.", "sd1"),
+    ("control_model.", "controlnet"),
+    ("controlnet_", "controlnet"),
+    ("lora_te2_", "sdxl_lora"),
+    ("lora_unet_", "lora"),
+    ("encoder.down.", "vae"),
+    ("first_stage_model.", "vae"),
+]
+
+# Embedded metadata keys that name the architecture directly
+ARCHITECTURE_METADATA_KEYS = ("modelspec.architecture", "ss_base_model_version")
+
+_CACHE = None
+_CACHE_DIRTY = False
+_CACHE_LOCK = threading.Lock()
+
+
+# ----------------------------------------------------------------------
+# Sidecar cache
+# ----------------------------------------------------------------------
+def _atomic_write(path: str, data: dict):
+    """Write JSON atomically to avoid corruption."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _load_cache():
+    """Load the sidecar index once per process. Must hold _CACHE_LOCK."""
+    global _CACHE
+    if _CACHE is not None:
+        return _CACHE
+
+    _CACHE = {}
+    if os.path.exists(SIDECAR_PATH):
+        try:
+            with open(SIDECAR_PATH, "r") as f:
+                _CACHE = json.load(f)
+        except Exception as e:
+            logging.error(f"[ModelMetadata] Failed to load sidecar {SIDECAR_PATH}: {e}")
+
+    return _CACHE
+
+
+def _save_cache():
+    """Persist the sidecar index if it changed. Must hold _CACHE_LOCK."""
+    global _CACHE_DIRTY
+    if not _CACHE_DIRTY:
+        return
+
+    try:
+        _atomic_write(SIDECAR_PATH, _CACHE)
+        _CACHE_DIRTY = False
+    except Exception as e:
+        logging.error(f"[ModelMetadata] Failed to save sidecar {SIDECAR_PATH}: {e}")
+
+
+# ----------------------------------------------------------------------
+# Header parsing
+# ----------------------------------------------------------------------
+def read_safetensors_header(path: str):
+    """
+    Read only the JSON header of a safetensors file via mmap.
+    The tensor data is never touched, so multi-GB files cost a few pages.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) < 8:
+                raise ValueError("File too small for a safetensors header")
+
+            (header_len,) = struct.unpack("<Q", mm[:8])
+            if header_len > MAX_HEADER_BYTES or 8 + header_len > len(mm):
+                raise ValueError(f"Invalid safetensors header length: {header_len}")
+
+            return json.loads(mm[8:8 + header_len])
+
+
+def _detect_architecture(keys, embedded: dict):
+    for meta_key in ARCHITECTURE_METADATA_KEYS:
+        if embedded.get(meta_key):
+            return embedded[meta_key]
+
+    for prefix, arch in ARCHITECTURE_HINTS:
+        if any(k.startswith(prefix) for k in keys):
+            return arch
+
+    if any(".lora_up." in k or ".lora_A." in k for k in keys):
+        return "lora"
+
+    return "unknown"
+
+
+def _trim_metadata(embedded: dict):
+    trimmed = {}
+    for k, v in embedded.items():
+        if isinstance(v, str) and len(v) > METADATA_VALUE_LIMIT:
+            v = v[:METADATA_VALUE_LIMIT] + "…"
+        trimmed[k] = v
+    return trimmed
+
+
+def extract_metadata(path: str):
+    """
+    Summarize a model file: format, architecture, dtypes, parameter count
+    and embedded training metadata. Pickle checkpoints (.ckpt/.pth) cannot
+    be inspected without loading them, so only the format is reported.
+    """
+    if not path.lower().endswith(".safetensors"):
+        return {"format": "pickle"}
+
+    header = read_safetensors_header(path)
+    embedded = header.pop("__metadata__", None) or {}
+
+    dtypes = {}
+    params = 0
+    for info in header.values():
+        dtype = info.get("dtype", "unknown")
+        count = prod(info.get("shape", []))
+        dtypes[dtype] = dtypes.get(dtype, 0) + count
+        params += count
+
+    return {
+        "format": "safetensors",
+        "architecture": _detect_architecture(list(header), embedded),
+        "dtype": max(dtypes, key=dtypes.get) if dtypes else None,
+        "dtypes": dtypes,
+        "tensor_count": len(header),
+        "parameter_count": params,
+        "training_metadata": _trim_metadata(embedded)
+    }
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+def get_model_metadata(model_type: str, filename: str, persist: bool = True):
+    """
+    Metadata for a single model, served from the sidecar cache when the
+    file's size and mtime are unchanged. With persist=False a fresh
+    result is only cached in memory; callers save the sidecar themselves.
+    """
+    if model_type not in MODEL_TYPES:
+        return None
+
+    rel_path = os.path.join(MODEL_TYPES[model_type], os.path.basename(filename))
+    full_path = os.path.join(MODEL_ROOT, rel_path)
+
+    try:
+        st = os.stat(full_path)
+    except FileNotFoundError:
+        return None
+
+    with _CACHE_LOCK:
+        cached = _load_cache().get(rel_path)
+        if cached and cached["size"] == st.st_size and cached["mtime"] == st.st_mtime:
+            return cached["metadata"]
+
+    try:
+        metadata = extract_metadata(full_path)
+    except Exception as e:
+        logging.error(f"[ModelMetadata] Failed to read header of {full_path}: {e}")
+        metadata = {"format": "unknown", "error": str(e)}
+
+    global _CACHE_DIRTY
+    with _CACHE_LOCK:
+        _load_cache()[rel_path] = {"size": st.st_size, "mtime": st.st_mtime, "metadata": metadata}
+        _CACHE_DIRTY = True
+        if persist:
+            _save_cache()
+
+    return metadata
+
+
+def list_model_metadata(model_type: str):
+    """
+    Returns {filename: metadata} for every model of a type, or None for
+    an unknown type.
+    """
+    entries = get_model_entries(model_type)
+    if entries is None:
+        logging.warning(f"[ModelMetadata] Invalid model type requested: {model_type}")
+        return None
+
+    result = {}
+    for name in sorted(entries):
+        metadata = get_model_metadata(model_type, name, persist=False)
+        if metadata is not None:
+            result[name] = metadata
+
+    with _CACHE_LOCK:
+        _save_cache()
+
+    return result
@@ -1,7 +1,8 @@
-import json
-import os
 import logging
 
+from services.config_cache import load_cached, invalidate
+from services.settings_store import save_entries
+
 SELECTION_PATH = "/workspace/pipeline/workflows/active_models.json"
 
 # Full schema for model selection + style-compatible fields
@@ -33,33 +34,23 @@ def _normalize_selection(data: dict):
 
 def load_selection():
     """
-    Loads the active model selection, normalizes it, and returns it.
+    Loads the active model selection, normalizes it, and returns a
+    read-only view. The file is only re-read when its mtime changes;
+    use .copy() before modifying the result.
     """
-    if not os.path.exists(SELECTION_PATH):
-        logging.info("[ModelSelection] No selection file found, using defaults.")
-        return DEFAULT_SELECTION.copy()
-
-    try:
-        with open(SELECTION_PATH, "r") as f:
-            data = json.load(f)
-    except Exception as e:
-        logging.error(f"[ModelSelection] Failed to load selection file: {e}")
-        return DEFAULT_SELECTION.copy()
-
-    normalized = _normalize_selection(data)
-    logging.info(f"[ModelSelection] Loaded selection: {normalized}")
-    return normalized
+    return load_cached(SELECTION_PATH, _normalize_selection, DEFAULT_SELECTION, label="ModelSelection")
 
 
 def save_selection(data: dict):
     """
     Saves the active model selection after normalizing it.
+    The write is atomic and serialized through the settings store.
     """
     normalized = _normalize_selection(data)
 
     try:
-        with open(SELECTION_PATH, "w") as f:
-            json.dump(normalized, f, indent=4)
+        save_entries("selection", SELECTION_PATH, None, normalized)
+        invalidate(SELECTION_PATH)
         logging.info(f"[ModelSelection] Saved selection: {normalized}")
         return True
     except Exception as e:
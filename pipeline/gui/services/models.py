@@ -1,5 +1,7 @@
 import os
+import time
 import logging
+import threading
 
 MODEL_ROOT = "/workspace/models"
 
@@ -17,36 +19,107 @@ MODEL_TYPES = {
 
 VALID_EXTENSIONS = (".safetensors", ".ckpt", ".pth")
 
+# Minimum seconds between directory mtime checks for the same folder
+INDEX_CHECK_INTERVAL = 2.0
 
-def _safe_listdir(path):
-    """Safely list files in a directory."""
+# In-memory model index:
+# { model_type: { "mtime": ns, "checked": ts, "files": { name: {"size", "mtime"} } } }
+_INDEX = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def _scan_folder(path):
+    """
+    List model files in a folder with their size and mtime.
+
+    Uses scandir so file-type checks come from the directory entry. Every
+    file is stat'ed: a model replaced under the same name keeps its name
+    but not its size or mtime.
+    """
+    files = {}
     try:
-        return os.listdir(path)
+        with os.scandir(path) as it:
+            for entry in it:
+                if not entry.name.lower().endswith(VALID_EXTENSIONS):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files[entry.name] = {"size": st.st_size, "mtime": st.st_mtime}
     except Exception as e:
         logging.error(f"[ModelManager] Failed to list directory {path}: {e}")
-        return []
+    return files
 
 
-def list_models():
+def _refresh_type(model_type: str, force: bool = False):
     """
-    Returns a dictionary of all model types and their files.
+    Bring the index entry for one model type up to date.
+
+    The folder is only re-listed when its directory mtime changed (a file
+    was added, removed or renamed); otherwise the cached listing is kept.
+    Must be called with _INDEX_LOCK held.
     """
-    result = {}
+    path = os.path.join(MODEL_ROOT, MODEL_TYPES[model_type])
+    entry = _INDEX.get(model_type)
+    now = time.monotonic()
+
+    if entry and not force and now - entry["checked"] < INDEX_CHECK_INTERVAL:
+        return entry
 
-    for key, folder in MODEL_TYPES.items():
-        path = os.path.join(MODEL_ROOT, folder)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
         os.makedirs(path, exist_ok=True)
+        mtime = os.stat(path).st_mtime_ns
 
-        files = [
-            f for f in _safe_listdir(path)
-            if os.path.isfile(os.path.join(path, f))
-            and f.lower().endswith(VALID_EXTENSIONS)
-        ]
+    if entry and not force and entry["mtime"] == mtime:
+        entry["checked"] = now
+        return entry
 
-        files.sort()
-        result[key] = files
+    files = _scan_folder(path)
+    entry = {"mtime": mtime, "checked": now, "files": files}
+    _INDEX[model_type] = entry
 
-        logging.info(f"[ModelManager] {key}: {len(files)} models found in {path}")
+    logging.info(f"[ModelManager] {model_type}: {len(files)} models indexed in {path}")
+    return entry
+
+
+def invalidate_model_index(model_type: str | None = None):
+    """
+    Drop cached listings so the next request re-scans.
+    Call after writing model files from within the app.
+    """
+    with _INDEX_LOCK:
+        if model_type is None:
+            _INDEX.clear()
+        else:
+            _INDEX.pop(model_type, None)
+
+
+def get_model_entries(model_type: str):
+    """
+    Returns {filename: {"size", "mtime"}} for a model type from the index,
+    or None for an unknown type.
+    """
+    if model_type not in MODEL_TYPES:
+        return None
+
+    with _INDEX_LOCK:
+        return dict(_refresh_type(model_type)["files"])
+
+
+def list_models():
+    """
+    Returns a dictionary of all model types and their files.
+    """
+    result = {}
+
+    with _INDEX_LOCK:
+        for key in MODEL_TYPES:
+            result[key] = sorted(_refresh_type(key)["files"])
 
     return result
 
@@ -59,17 +132,5 @@ def list_models_by_type(model_type: str):
         logging.warning(f"[ModelManager] Invalid model type requested: {model_type}")
         return None
 
-    folder = MODEL_TYPES[model_type]
-    path = os.path.join(MODEL_ROOT, folder)
-    os.makedirs(path, exist_ok=True)
-
-    files = [
-        f for f in _safe_listdir(path)
-        if os.path.isfile(os.path.join(path, f))
-        and f.lower().endswith(VALID_EXTENSIONS)
-    ]
-
-    files.sort()
-
-    logging.info(f"[ModelManager] Listed {len(files)} models for type: {model_type} in {path}")
-    return files
+    with _INDEX_LOCK:
+        return sorted(_refresh_type(model_type)["files"])
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import logging
+import threading
+
+COMFYUI_URL = "http://127.0.0.1:8188"
+
+# Snapshot of ComfyUI's /object_info, so checks work while ComfyUI is down
+CATALOG_PATH = os.environ.get("SPRITEFORGE_NODE_CATALOG", "/workspace/pipeline/object_info.json")
+
+# Seconds between background refreshes of the snapshot
+CATALOG_REFRESH_INTERVAL = 600
+
+# Compact catalog built from the snapshot:
+# { class_type: {"required": {name: options|None}, "optional": {...}, "hidden": {...}} }
+# options is a frozenset of allowed enum values, or None for free inputs.
+_CATALOG = None
+_SNAPSHOT_TRIED = False
+_CATALOG_LOCK = threading.Lock()
+
+_STATUS = {"source": None, "updated": None, "node_types": 0, "last_error": None}
+_WAKE = threading.Event()
+_THREAD = None
+
+INPUT_SECTIONS = ("required", "optional", "hidden")
+
+
+# ----------------------------------------------------------------------
+# Snapshot handling
+# ----------------------------------------------------------------------
+def _atomic_write(path: str, data: dict):
+    """Write JSON atomically to avoid corruption."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def build_catalog(object_info: dict):
+    """Reduce a raw /object_info response to input names and enum options."""
+    catalog = {}
+    for class_type, info in object_info.items():
+        spec = (info or {}).get("input") or {}
+        entry = {}
+        for section in INPUT_SECTIONS:
+            inputs = {}
+            for name, definition in (spec.get(section) or {}).items():
+                kind = definition[0] if isinstance(definition, (list, tuple)) and definition else definition
+                inputs[name] = frozenset(str(v) for v in kind) if isinstance(kind, list) else None
+            entry[section] = inputs
+        catalog[class_type] = entry
+    return catalog
+
+
+def _install(object_info: dict, source: str, updated: float):
+    global _CATALOG
+    catalog = build_catalog(object_info)
+    with _CATALOG_LOCK:
+        _CATALOG = catalog
+    _STATUS.update({"source": source, "updated": updated, "node_types": len(catalog)})
+
+
+def _load_snapshot():
+    """Load the on-disk snapshot once if nothing is loaded yet."""
+    global _SNAPSHOT_TRIED
+    _SNAPSHOT_TRIED = True
+    if not os.path.exists(CATALOG_PATH):
+        return
+    try:
+        with open(CATALOG_PATH, "r") as f:
+            object_info = json.load(f)
+        _install(object_info, "snapshot", os.path.getmtime(CATALOG_PATH))
+        logging.info(f"[NodeCatalog] Loaded {len(object_info)} node types from {CATALOG_PATH}")
+    except Exception as e:
+        logging.error(f"[NodeCatalog] Failed to load snapshot {CATALOG_PATH}: {e}")
+
+
+def get_catalog():
+    """Return the current catalog, or None if no snapshot is available."""
+    with _CATALOG_LOCK:
+        loaded = _CATALOG is not None or _SNAPSHOT_TRIED
+    if not loaded:
+        _load_snapshot()
+    with _CATALOG_LOCK:
+        return _CATALOG
+
+
+def refresh_catalog():
+    """Fetch /object_info from ComfyUI, snapshot it and rebuild the catalog."""
+    import requests
+
+    try:
+        r = requests.get(f"{COMFYUI_URL}/object_info", timeout=30)
+        r.raise_for_status()
+        object_info = r.json()
+    except Exception as e:
+        _STATUS["last_error"] = str(e)
+        logging.warning(f"[NodeCatalog] Failed to fetch /object_info: {e}")
+        return False
+
+    try:
+        _atomic_write(CATALOG_PATH, object_info)
+    except Exception as e:
+        logging.error(f"[NodeCatalog] Failed to write snapshot {CATALOG_PATH}: {e}")
+
+    _install(object_info, "comfyui", time.time())
+    _STATUS["last_error"] = None
+    logging.info(f"[NodeCatalog] Refreshed catalog: {len(object_info)} node types")
+    return True
+
+
+# ----------------------------------------------------------------------
+# Background worker
+# ----------------------------------------------------------------------
+def _refresh_loop():
+    get_catalog()
+
+    while True:
+        refresh_catalog()
+        _WAKE.wait(CATALOG_REFRESH_INTERVAL)
+        _WAKE.clear()
+
+
+def start_background_refresh():
+    """Start the background catalog refresher once per process."""
+    global _THREAD
+    if _THREAD is not None and _THREAD.is_alive():
+        return
+
+    _THREAD = threading.Thread(target=_refresh_loop, daemon=True, name="NodeCatalog")
+    _THREAD.start()
+    logging.info("[NodeCatalog] Background refresher started")
+
+
+def request_refresh():
+    """Wake the background refresher for an immediate refresh."""
+    _WAKE.set()
+
+
+def get_catalog_status():
+    return dict(_STATUS)
+
+
+# ----------------------------------------------------------------------
+# Checks
+# ----------------------------------------------------------------------
+def required_inputs(node_type):
+    """
+    Required input names for a node type, for graph_validator.analyze_graph.
+    Unknown types (or no catalog) require nothing.
+    """
+    catalog = get_catalog()
+    if not catalog or node_type not in catalog:
+        return ()
+    return tuple(catalog[node_type]["required"])
+
+
+def _enum_allows(options, value):
+    """Enum check; absolute model paths match the filename ComfyUI lists."""
+    value = str(value)
+    if value in options:
+        return True
+    return any(value.endswith("/" + option) for option in options)
+
+
+def _is_link(value):
+    return isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[1], int)
+
+
+def check_workflow(workflow: dict, check_required: bool = True):
+    """
+    Check an API-format workflow against the catalog: node types, input
+    names, missing required inputs and enum values. Unfilled @placeholders
+    are skipped. Returns a list of error messages; empty when everything
+    passes or no catalog is available.
+    """
+    catalog = get_catalog()
+    if not catalog:
+        return []
+
+    errors = []
+    for nid, node in workflow.items():
+        node_type = node.get("class_type")
+        spec = catalog.get(node_type)
+        if spec is None:
+            errors.append(f"Node {nid}: unknown node type '{node_type}'")
+            continue
+
+        inputs = node.get("inputs") or {}
+        known = {}
+        for section in INPUT_SECTIONS:
+            known.update(spec[section])
+
+        for name in spec["required"] if check_required else ():
+            if name not in inputs:
+                errors.append(f"Node {nid} ({node_type}): missing required input '{name}'")
+
+        for name, value in inputs.items():
+            if name not in known:
+                errors.append(f"Node {nid} ({node_type}): unknown input '{name}'")
+                continue
+
+            options = known[name]
+            if options is None or _is_link(value):
+                continue
+            if isinstance(value, str) and value.startswith("@"):
+                continue
+            if not _enum_allows(options, value):
+                errors.append(f"Node {nid} ({node_type}): invalid value '{value}' for input '{name}'")
+
+    return errors
@@ -1,101 +1,298 @@
-import json
 import os
 import logging
+import threading
 
-WORKFLOW_DIR = "/workspace/pipeline/workflows"
+from services.workflows import load_workflow_versioned
 
+# Side length of the spatial grid cells used for viewport queries
+GRID_CELL_SIZE = 512
 
-def load_workflow_json(name: str):
-    """Safely load a workflow JSON file."""
-    path = os.path.join(WORKFLOW_DIR, os.path.basename(name))
+# Fields a node listing can be projected to
+NODE_FIELDS = ("id", "type", "title", "position", "inputs", "outputs", "incoming", "outgoing")
+DEFAULT_NODE_FIELDS = ("id", "type")
+
+# Graph index cache for workflow documents: { name: (version, index) }
+_DOC_CACHE = {}
+_GRAPH_LOCK = threading.Lock()
 
-    if not os.path.exists(path):
-        logging.warning(f"[NodeInspector] Workflow not found: {name}")
-        return None
 
+def _node_position(node: dict):
+    """
+    Node canvas position as (x, y), from a LiteGraph-style "pos" ([x, y]
+    or {"0": x, "1": y}) or a Vue Flow-style "position" ({"x", "y"}).
+    """
+    pos = node.get("position", node.get("pos"))
     try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        logging.error(f"[NodeInspector] Failed to load workflow {name}: {e}")
+        if isinstance(pos, dict):
+            x = pos.get("x", pos.get("0"))
+            y = pos.get("y", pos.get("1"))
+        elif isinstance(pos, (list, tuple)) and len(pos) >= 2:
+            x, y = pos[0], pos[1]
+        else:
+            return None
+        return (float(x), float(y))
+    except (TypeError, ValueError):
         return None
 
 
-def list_nodes(workflow_name: str):
-    """Return a list of nodes with id + type."""
-    data = load_workflow_json(workflow_name)
-    if not data:
-        return None
+def _cell(x: float, y: float):
+    return (int(x // GRID_CELL_SIZE), int(y // GRID_CELL_SIZE))
+
 
+def build_graph_index(data: dict):
+    """
+    Build a node-by-id map plus incoming/outgoing adjacency lists in a
+    single pass over nodes and connections, and a grid spatial index over
+    node positions.
+    Returns None if the workflow is malformed.
+    """
     nodes = data.get("nodes", [])
     if not isinstance(nodes, list):
         logging.error("[NodeInspector] Invalid workflow: 'nodes' must be a list")
         return None
 
-    result = []
+    by_id = {}
+    order = []
     for node in nodes:
         nid = str(node.get("id"))
-        ntype = node.get("type") or node.get("class_type")
-        result.append({"id": nid, "type": ntype})
-
-    return result
-
-
-def get_node_details(workflow_name: str, node_id: str):
-    """Return full details for a specific node."""
-    data = load_workflow_json(workflow_name)
-    if not data:
-        return None
+        # First occurrence wins, matching the old linear scan
+        if nid not in by_id:
+            order.append(nid)
+            by_id[nid] = node
 
-    nodes = data.get("nodes", [])
-    if not isinstance(nodes, list):
-        logging.error("[NodeInspector] Invalid workflow: 'nodes' must be a list")
-        return None
+    incoming = {nid: [] for nid in order}
+    outgoing = {nid: [] for nid in order}
 
-    # Normalize node_id to string for comparison
-    node_id = str(node_id)
-
-    # Find node
-    node = None
-    for n in nodes:
-        if str(n.get("id")) == node_id:
-            node = n
-            break
+    rank = {nid: i for i, nid in enumerate(order)}
+    positions = {}
+    grid = {}
+    for nid in order:
+        pos = _node_position(by_id[nid])
+        if pos is not None:
+            positions[nid] = pos
+            grid.setdefault(_cell(*pos), []).append(nid)
 
-    if not node:
-        logging.warning(f"[NodeInspector] Node not found: {node_id}")
-        return None
-
-    connections = data.get("connections", [])
-    incoming = []
-    outgoing = []
-
-    for conn in connections:
+    for conn in data.get("connections", []):
         # Support variable-length connection tuples
         if len(conn) < 4:
             continue
 
         src, src_out, dst, dst_in = conn[:4]
+        src, dst = str(src), str(dst)
 
-        if str(dst) == node_id:
-            incoming.append({
-                "from": str(src),
+        if dst in incoming:
+            incoming[dst].append({
+                "from": src,
                 "output": src_out,
                 "input": dst_in
             })
 
-        if str(src) == node_id:
-            outgoing.append({
-                "to": str(dst),
+        if src in outgoing:
+            outgoing[src].append({
+                "to": dst,
                 "output": src_out,
                 "input": dst_in
             })
 
+    return {
+        "order": order,
+        "rank": rank,
+        "nodes": by_id,
+        "incoming": incoming,
+        "outgoing": outgoing,
+        "positions": positions,
+        "grid": grid
+    }
+
+
+def get_graph_index(workflow_name: str):
+    """
+    Return the graph index for a workflow as the editor currently has it
+    (including patches not yet flushed to disk), rebuilding it only when
+    the document version changed.
+    """
+    name = os.path.basename(workflow_name)
+    data, version = load_workflow_versioned(name)
+    if data is None:
+        return None
+
+    return get_document_index(name, data, version)
+
+
+def get_document_index(name: str, data: dict, version):
+    """
+    Return the graph index for an open editor document, rebuilding it
+    only when the document version changed. `data` must not be mutated
+    in place (workflows.py replaces documents on every change).
+    """
+    with _GRAPH_LOCK:
+        cached = _DOC_CACHE.get(name)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    index = build_graph_index(data)
+    if index is None:
+        return None
+
+    with _GRAPH_LOCK:
+        _DOC_CACHE[name] = (version, index)
+
+    logging.info(f"[NodeInspector] Indexed workflow {name} v{version}: {len(index['order'])} nodes")
+    return index
+
+
+def _node_type(node: dict):
+    return node.get("type") or node.get("class_type")
+
+
+def list_nodes(workflow_name: str):
+    """Return a list of nodes with id + type."""
+    index = get_graph_index(workflow_name)
+    if not index:
+        return None
+
+    return [
+        {"id": nid, "type": _node_type(index["nodes"][nid])}
+        for nid in index["order"]
+    ]
+
+
+def get_node_details(workflow_name: str, node_id: str):
+    """Return full details for a specific node."""
+    index = get_graph_index(workflow_name)
+    if not index:
+        return None
+
+    # Normalize node_id to string for comparison
+    node_id = str(node_id)
+
+    node = index["nodes"].get(node_id)
+    if not node:
+        logging.warning(f"[NodeInspector] Node not found: {node_id}")
+        return None
+
     return {
         "id": node_id,
-        "type": node.get("type") or node.get("class_type"),
+        "type": _node_type(node),
         "inputs": node.get("inputs", {}),
         "outputs": node.get("outputs", {}),
-        "incoming": incoming,
-        "outgoing": outgoing
+        "incoming": index["incoming"][node_id],
+        "outgoing": index["outgoing"][node_id]
     }
+
+
+def get_adjacency(workflow_name: str):
+    """
+    Return the whole graph in one response: node types plus incoming and
+    outgoing edges for every node.
+    """
+    index = get_graph_index(workflow_name)
+    if not index:
+        return None
+
+    return {
+        "nodes": [
+            {"id": nid, "type": _node_type(index["nodes"][nid])}
+            for nid in index["order"]
+        ],
+        "incoming": index["incoming"],
+        "outgoing": index["outgoing"]
+    }
+
+
+# ----------------------------------------------------------------------
+# Paginated / projected / viewport queries
+# ----------------------------------------------------------------------
+def _in_viewport(index: dict, bbox):
+    """Node IDs whose position lies inside bbox, in workflow order."""
+    x0, y0, x1, y1 = bbox
+    cx0, cy0 = _cell(x0, y0)
+    cx1, cy1 = _cell(x1, y1)
+    positions = index["positions"]
+    grid = index["grid"]
+
+    # Walk whichever is smaller: the covered cells or the occupied ones
+    if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(grid):
+        cells = (
+            grid.get((cx, cy), ())
+            for cx in range(cx0, cx1 + 1)
+            for cy in range(cy0, cy1 + 1)
+        )
+    else:
+        cells = (
+            nids for (cx, cy), nids in grid.items()
+            if cx0 <= cx <= cx1 and cy0 <= cy <= cy1
+        )
+
+    hits = [
+        nid for nids in cells for nid in nids
+        if x0 <= positions[nid][0] <= x1 and y0 <= positions[nid][1] <= y1
+    ]
+    hits.sort(key=index["rank"].__getitem__)
+    return hits
+
+
+def _project(index: dict, nid: str, fields):
+    node = index["nodes"][nid]
+    values = {
+        "id": lambda: nid,
+        "type": lambda: _node_type(node),
+        "title": lambda: node.get("title"),
+        "position": lambda: index["positions"].get(nid),
+        "inputs": lambda: node.get("inputs", {}),
+        "outputs": lambda: node.get("outputs", {}),
+        "incoming": lambda: index["incoming"][nid],
+        "outgoing": lambda: index["outgoing"][nid],
+    }
+    return {field: values[field]() for field in fields}
+
+
+def query_index(index: dict, offset: int = 0, limit=None, fields=None, bbox=None,
+                connections: bool = False):
+    """
+    Page through a graph index.
+
+    `fields` projects each node to a subset of NODE_FIELDS (default id
+    and type); `bbox` = (x0, y0, x1, y1) keeps only nodes positioned
+    inside that canvas rectangle, using the grid spatial index. With
+    `connections`, the page also lists the connections ending at its
+    nodes as [src, src_output, dst, dst_input], so every connection
+    arrives exactly once across all pages.
+    Raises ValueError for unknown fields.
+    """
+    fields = tuple(fields or DEFAULT_NODE_FIELDS)
+    unknown = [f for f in fields if f not in NODE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown node fields: {', '.join(unknown)}")
+
+    nids = _in_viewport(index, bbox) if bbox else index["order"]
+    total = len(nids)
+    offset = max(0, offset)
+    end = total if limit is None else min(total, offset + max(0, limit))
+    page = nids[offset:end]
+
+    result = {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": end if end < total else None,
+        "nodes": [_project(index, nid, fields) for nid in page]
+    }
+
+    if connections:
+        result["connections"] = [
+            [edge["from"], edge["output"], nid, edge["input"]]
+            for nid in page
+            for edge in index["incoming"][nid]
+        ]
+
+    return result
+
+
+def query_nodes(workflow_name: str, offset: int = 0, limit=None, fields=None, bbox=None):
+    """query_index over a workflow file; None if the workflow is missing."""
+    index = get_graph_index(workflow_name)
+    if not index:
+        return None
+    return query_index(index, offset, limit, fields, bbox)
+
@@ -0,0 +1,69 @@
+import os
+import re
+
+from services.models import MODEL_ROOT, MODEL_TYPES, get_model_entries
+
+# Workflow placeholders that name a model file, and the folder they live in
+MODEL_PLACEHOLDERS = {
+    "@checkpoint": "checkpoints",
+    "@lora": "loras",
+    "@vae": "vae",
+    "@controlnet": "controlnet",
+    "@ipadapter": "ipadapter"
+}
+
+_PLACEHOLDER_RE = re.compile(r"@[a-z_]+")
+
+
+def used_placeholders(workflow) -> set:
+    """Collect every @placeholder referenced by string values in a workflow."""
+    found = set()
+    stack = [workflow]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            if "@" in value:
+                found.update(_PLACEHOLDER_RE.findall(value))
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return found
+
+
+def resolve_model(model_type: str, value: str):
+    """
+    Resolve a selected model (bare filename or absolute path inside its
+    model folder) against the in-memory model index.
+    Returns the indexed filename, or None if it is not there.
+    """
+    entries = get_model_entries(model_type) or {}
+    folder = os.path.join(MODEL_ROOT, MODEL_TYPES[model_type])
+
+    if os.path.isabs(value):
+        value = os.path.normpath(value)
+        if os.path.dirname(value) != folder:
+            return None
+        value = os.path.basename(value)
+
+    return value if value in entries else None
+
+
+def preflight_models(workflow, replacements: dict) -> list:
+    """
+    Check that every model placeholder the workflow actually uses has a
+    value that exists in the model index. Only the index is consulted, so
+    this costs no filesystem stats beyond the index's own refresh.
+    Returns a list of error messages (empty when everything resolves).
+    """
+    errors = []
+    for placeholder in sorted(used_placeholders(workflow) & MODEL_PLACEHOLDERS.keys()):
+        model_type = MODEL_PLACEHOLDERS[placeholder]
+        value = replacements.get(placeholder)
+
+        if not value:
+            errors.append(f"Workflow uses {placeholder} but no {model_type} model is selected")
+        elif resolve_model(model_type, str(value)) is None:
+            errors.append(f"{model_type} model not found: {value}")
+
+    return errors
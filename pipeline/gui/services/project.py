@@ -1,11 +1,37 @@
 import os
 import json
 import uuid
+import hashlib
 import logging
+import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 PROJECT_ROOT = "/workspace/projects"
+PROJECT_INDEX_PATH = os.path.join(PROJECT_ROOT, ".project_index.json")
+
+# Keys searched (top level, then "sprite" and "outputs") for a thumbnail path
+THUMBNAIL_KEYS = ("thumbnail", "preview", "spritesheet")
+
+# Content-addressed store shared by every project's version snapshots
+BLOB_ROOT = os.path.join(PROJECT_ROOT, ".blobs")
+
+# Sub-documents stored as separate blobs so unchanged ones are shared
+# between versions; all remaining keys go into the "meta" blob
+SNAPSHOT_SECTIONS = ("motion", "sprite", "models", "workflow", "batch", "outputs")
+
+# Fields the project listing can be sorted by
+SORT_FIELDS = ("last_modified", "created", "name", "project_id")
+
+# In-memory summary index: { project_id: summary }, persisted to
+# PROJECT_INDEX_PATH and reconciled with PROJECT_ROOT when its mtime changes
+_INDEX: Optional[Dict[str, Dict[str, Any]]] = None
+_INDEX_ROOT_MTIME = None
+_INDEX_LOCK = threading.Lock()
+
+# Per-project locks serializing version assignment, writes and snapshots
+_PROJECT_LOCKS: Dict[str, threading.Lock] = {}
+_PROJECT_LOCKS_GUARD = threading.Lock()
 
 
 # ----------------------------------------------------------------------
@@ -19,24 +45,342 @@ def _atomic_write(path: str, data: dict):
     os.replace(tmp, path)
 
 
+def _project_lock(project_id: str) -> threading.Lock:
+    """Return a per-project lock, creating it if needed."""
+    with _PROJECT_LOCKS_GUARD:
+        if project_id not in _PROJECT_LOCKS:
+            _PROJECT_LOCKS[project_id] = threading.Lock()
+        return _PROJECT_LOCKS[project_id]
+
+
 def _ensure_project_dir(project_id: str) -> str:
     project_dir = os.path.join(PROJECT_ROOT, project_id)
     os.makedirs(project_dir, exist_ok=True)
     return project_dir
 
 
+# ----------------------------------------------------------------------
+# Project index
+# ----------------------------------------------------------------------
+def _read_project(project_id: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(PROJECT_ROOT, project_id, "project.json")
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.error(f"[Project] Failed to read {path}: {e}")
+        return None
+
+
+def _find_thumbnail(project: Dict[str, Any]) -> Optional[str]:
+    for section in (project, project.get("sprite"), project.get("outputs")):
+        if not isinstance(section, dict):
+            continue
+        for key in THUMBNAIL_KEYS:
+            if isinstance(section.get(key), str):
+                return section[key]
+    return None
+
+
+def _summarize(project: Dict[str, Any]) -> Dict[str, Any]:
+    """The listing fields kept in the index for one project."""
+    outputs = project.get("outputs")
+    counts = {}
+    if isinstance(outputs, dict):
+        for key, value in outputs.items():
+            counts[key] = len(value) if isinstance(value, (list, dict)) else int(bool(value))
+
+    return {
+        "project_id": project.get("project_id"),
+        "name": project.get("name"),
+        "created": project.get("created"),
+        "last_modified": project.get("last_modified"),
+        "version": project.get("version"),
+        "thumbnail": _find_thumbnail(project),
+        "output_counts": counts
+    }
+
+
+def _save_index():
+    """Persist the index. Must hold _INDEX_LOCK."""
+    try:
+        _atomic_write(PROJECT_INDEX_PATH, _INDEX)
+    except Exception as e:
+        logging.error(f"[Project] Failed to write project index: {e}")
+
+
+def _root_mtime():
+    try:
+        return os.stat(PROJECT_ROOT).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _load_index():
+    """
+    Return the summary index, loading it from disk once and reconciling
+    it with the project folders whenever PROJECT_ROOT's mtime changes
+    (a project was added or removed outside save_project).
+    Must hold _INDEX_LOCK.
+    """
+    global _INDEX, _INDEX_ROOT_MTIME
+
+    if _INDEX is None:
+        _INDEX = {}
+        if os.path.exists(PROJECT_INDEX_PATH):
+            try:
+                with open(PROJECT_INDEX_PATH, "r") as f:
+                    _INDEX = json.load(f)
+            except Exception as e:
+                logging.error(f"[Project] Failed to load project index: {e}")
+
+    mtime = _root_mtime()
+    if mtime == _INDEX_ROOT_MTIME:
+        return _INDEX
+
+    changed = False
+    present = set()
+    if mtime is not None:
+        with os.scandir(PROJECT_ROOT) as it:
+            for entry in it:
+                if entry.name.startswith(".") or not entry.is_dir():
+                    continue
+                present.add(entry.name)
+                if entry.name not in _INDEX:
+                    project = _read_project(entry.name)
+                    if project is not None:
+                        project.setdefault("project_id", entry.name)
+                        _INDEX[entry.name] = _summarize(project)
+                        changed = True
+
+    for project_id in [p for p in _INDEX if p not in present]:
+        del _INDEX[project_id]
+        changed = True
+
+    _INDEX_ROOT_MTIME = mtime
+    if changed and mtime is not None:
+        _save_index()
+    return _INDEX
+
+
+def _index_project(project: Dict[str, Any]):
+    """Update one project's entry in the index after it was written."""
+    with _INDEX_LOCK:
+        index = _load_index()
+        index[project["project_id"]] = _summarize(project)
+        _save_index()
+
+
+def rebuild_project_index():
+    """Drop the index and rebuild it from every project.json."""
+    global _INDEX, _INDEX_ROOT_MTIME
+    with _INDEX_LOCK:
+        _INDEX = {}
+        _INDEX_ROOT_MTIME = None
+        count = len(_load_index())
+        _save_index()
+    logging.info(f"[Project] Rebuilt project index: {count} projects")
+    return count
+
+
+# ----------------------------------------------------------------------
+# Version snapshots
+# ----------------------------------------------------------------------
+def _versions_dir(project_id: str) -> str:
+    return os.path.join(PROJECT_ROOT, project_id, "versions")
+
+
+def _put_blob(value) -> str:
+    """Store a JSON value by the SHA-256 of its canonical form; return the hash."""
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    path = os.path.join(BLOB_ROOT, digest[:2], digest + ".json")
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(raw)
+        os.replace(tmp, path)
+
+    return digest
+
+
+def _get_blob(digest: str):
+    with open(os.path.join(BLOB_ROOT, digest[:2], digest + ".json"), "r") as f:
+        return json.load(f)
+
+
+def _write_snapshot(project: Dict[str, Any]):
+    """Record a saved project as a version manifest of section blob hashes."""
+    meta = {k: v for k, v in project.items() if k not in SNAPSHOT_SECTIONS}
+    sections = {"meta": _put_blob(meta)}
+    for section in SNAPSHOT_SECTIONS:
+        if section in project:
+            sections[section] = _put_blob(project[section])
+
+    versions_dir = _versions_dir(project["project_id"])
+    os.makedirs(versions_dir, exist_ok=True)
+    _atomic_write(os.path.join(versions_dir, f"{project['version']}.json"), {
+        "version": project["version"],
+        "saved": project.get("last_modified"),
+        "sections": sections
+    })
+
+
+def _snapshot_legacy(project_id: str) -> int:
+    """
+    Snapshot a project saved before versioning existed, so its current
+    state can still be listed and restored. Returns its version (0 if
+    there is no project.json). Must hold the project's lock.
+    """
+    existing = _read_project(project_id)
+    if existing is None:
+        return 0
+
+    version = existing.get("version")
+    existing["project_id"] = project_id
+    existing["version"] = version if isinstance(version, int) and version > 0 else 1
+    _write_snapshot(existing)
+    logging.info(f"[Project] Snapshotted existing project {project_id} as version {existing['version']}")
+    return existing["version"]
+
+
+def _latest_version(project_id: str) -> int:
+    """Highest version with a manifest in the versions folder (0 if none)."""
+    try:
+        names = os.listdir(_versions_dir(project_id))
+    except FileNotFoundError:
+        return 0
+
+    versions = [int(stem) for stem, ext in map(os.path.splitext, names) if ext == ".json" and stem.isdigit()]
+    return max(versions, default=0)
+
+
+def _read_manifest(project_id: str, version: int) -> Optional[Dict[str, Any]]:
+    path = os.path.join(_versions_dir(project_id), f"{int(version)}.json")
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(project_id: str) -> Optional[List[Dict[str, Any]]]:
+    """Version manifests of a project, oldest first; None if it has none."""
+    versions_dir = _versions_dir(os.path.basename(project_id))
+    if not os.path.isdir(versions_dir):
+        return None
+
+    versions = []
+    for name in os.listdir(versions_dir):
+        stem, ext = os.path.splitext(name)
+        if ext == ".json" and stem.isdigit():
+            manifest = _read_manifest(project_id, int(stem))
+            if manifest:
+                versions.append(manifest)
+
+    versions.sort(key=lambda m: m["version"])
+    return versions
+
+
+def load_version(project_id: str, version: int) -> Optional[Dict[str, Any]]:
+    """Reassemble a project as it was saved at `version`."""
+    manifest = _read_manifest(os.path.basename(project_id), version)
+    if manifest is None:
+        return None
+
+    sections = manifest["sections"]
+    project = _get_blob(sections["meta"])
+    for section, digest in sections.items():
+        if section != "meta":
+            project[section] = _get_blob(digest)
+    return project
+
+
+def _key_changes(old, new) -> Dict[str, List[str]]:
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return {"added": [], "removed": [], "changed": ["(value)"]}
+    return {
+        "added": sorted(k for k in new if k not in old),
+        "removed": sorted(k for k in old if k not in new),
+        "changed": sorted(k for k in new if k in old and old[k] != new[k])
+    }
+
+
+def diff_versions(project_id: str, old: int, new: int) -> Optional[Dict[str, Any]]:
+    """
+    Compare two versions. Sections are compared by blob hash, so only
+    the sections that actually changed are loaded to list changed keys.
+    """
+    project_id = os.path.basename(project_id)
+    a = _read_manifest(project_id, old)
+    b = _read_manifest(project_id, new)
+    if a is None or b is None:
+        return None
+
+    sa, sb = a["sections"], b["sections"]
+    changes = {}
+    for section in sorted(set(sa) | set(sb)):
+        if sa.get(section) == sb.get(section):
+            continue
+        before = _get_blob(sa[section]) if section in sa else {}
+        after = _get_blob(sb[section]) if section in sb else {}
+        changes[section] = _key_changes(before, after)
+
+    return {
+        "project_id": project_id,
+        "from": old,
+        "to": new,
+        "unchanged": sorted(s for s in set(sa) & set(sb) if sa[s] == sb[s]),
+        "changes": changes
+    }
+
+
+def restore_version(project_id: str, version: int) -> Optional[Dict[str, Any]]:
+    """Save an old version again as the newest one; history is kept."""
+    project = load_version(project_id, version)
+    if project is None:
+        return None
+
+    project["project_id"] = os.path.basename(project_id)
+    logging.info(f"[Project] Restoring project {project['project_id']} from version {version}")
+    return save_project(project)
+
+
 # ----------------------------------------------------------------------
 # Save / Load
 # ----------------------------------------------------------------------
 def save_project(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Save a project safely and return the updated metadata.
+    Each save becomes a new version with its own snapshot.
     """
     project_id = data.get("project_id") or str(uuid.uuid4())[:8]
+
+    with _project_lock(project_id):
+        return _save_project_locked(project_id, data)
+
+
+def _save_project_locked(project_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
     project_dir = _ensure_project_dir(project_id)
 
+    # First versioned save of an older project: keep its current state
+    if not os.path.isdir(_versions_dir(project_id)):
+        try:
+            _snapshot_legacy(project_id)
+        except Exception as e:
+            logging.error(f"[Project] Failed to snapshot existing project {project_id}: {e}")
+
+    # Number from what is on disk, never the summary index, which may be
+    # stale and would let a save overwrite an existing manifest
+    current = (_read_project(project_id) or {}).get("version")
+    last_version = max(_latest_version(project_id), current if isinstance(current, int) else 0)
+
     data["project_id"] = project_id
-    data["version"] = 1
+    data["version"] = last_version + 1
     data["last_modified"] = datetime.utcnow().isoformat()
 
     if "created" not in data:
@@ -49,7 +393,14 @@ def save_project(data: Dict[str, Any]) -> Dict[str, Any]:
         logging.info(f"[Project] Saved project {project_id}")
     except Exception as e:
         logging.error(f"[Project] Failed to save project {project_id}: {e}")
+        return data
+
+    try:
+        _write_snapshot(data)
+    except Exception as e:
+        logging.error(f"[Project] Failed to snapshot project {project_id} v{data['version']}: {e}")
 
+    _index_project(data)
     return data
 
 
@@ -75,17 +426,37 @@ def list_projects() -> list:
     """
     Return a list of all project IDs.
     """
-    if not os.path.exists(PROJECT_ROOT):
-        return []
+    with _INDEX_LOCK:
+        return sorted(_load_index())
 
-    projects = []
-    for name in os.listdir(PROJECT_ROOT):
-        path = os.path.join(PROJECT_ROOT, name, "project.json")
-        if os.path.exists(path):
-            projects.append(name)
 
-    projects.sort()
-    return projects
+def list_project_summaries(sort: str = "last_modified", descending: bool = True,
+                           offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Return a sorted page of project summaries (name, dates, thumbnail,
+    output counts) from the in-memory index.
+    Raises ValueError for an unknown sort field.
+    """
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort field: {sort}")
+
+    with _INDEX_LOCK:
+        summaries: List[Dict[str, Any]] = list(_load_index().values())
+
+    # Missing values sort last in either direction
+    present = [s for s in summaries if s.get(sort) is not None]
+    missing = [s for s in summaries if s.get(sort) is None]
+    present.sort(key=lambda s: (s[sort], s["project_id"] or ""), reverse=descending)
+    ordered = present + missing
+
+    offset = max(0, offset)
+    end = len(ordered) if limit is None else offset + max(0, limit)
+    return {
+        "total": len(ordered),
+        "offset": offset,
+        "limit": limit,
+        "projects": [dict(s) for s in ordered[offset:end]]
+    }
 
 
 # ----------------------------------------------------------------------
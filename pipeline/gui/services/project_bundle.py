@@ -0,0 +1,320 @@
+import os
+import json
+import uuid
+import shutil
+import filecmp
+import tarfile
+import logging
+from typing import Dict, Any, Iterator, Optional
+
+from services.project import PROJECT_ROOT, load_project, save_project
+
+ANIMATION_ROOT = "/workspace/animations"
+SPRITE_ROOT = "/workspace/sprites"
+
+# Bundle folder -> output root it maps to on disk
+BUNDLE_ROOTS = {
+    "animations": ANIMATION_ROOT,
+    "sprites": SPRITE_ROOT
+}
+
+# Read/write size while streaming bundles; memory use stays at about this
+BUNDLE_CHUNK_SIZE = 1024 * 1024
+
+# project.json is parsed in memory, so cap its size inside a bundle
+MAX_PROJECT_JSON_SIZE = 64 * 1024 * 1024
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class BundleError(ValueError):
+    """Raised when an import bundle is malformed or unsafe."""
+
+
+def _zstd():
+    """Return the optional zstandard module, or None if not installed."""
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def zstd_available() -> bool:
+    return _zstd() is not None
+
+
+# ----------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------
+def _referenced_outputs(project: Dict[str, Any]):
+    """
+    Yield (arcname, path) for every file under the animation/sprite roots
+    that the project references, directly or through a referenced folder.
+    """
+    seen = set()
+    stack = [project]
+
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+            continue
+        if isinstance(value, list):
+            stack.extend(value)
+            continue
+        if not isinstance(value, str) or not os.path.isabs(value):
+            continue
+
+        path = os.path.normpath(value)
+        for folder, root in BUNDLE_ROOTS.items():
+            if not path.startswith(root + os.sep):
+                continue
+
+            if os.path.isdir(path):
+                files = (
+                    os.path.join(dirpath, f)
+                    for dirpath, _, names in os.walk(path)
+                    for f in names
+                )
+            elif os.path.isfile(path):
+                files = (path,)
+            else:
+                files = ()
+
+            for f in files:
+                if f not in seen:
+                    seen.add(f)
+                    yield folder + "/" + os.path.relpath(f, root).replace(os.sep, "/"), f
+
+
+def _tar_member(arcname: str, size: int, mtime: float, mode: int = 0o644) -> bytes:
+    info = tarfile.TarInfo(arcname)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = mode
+    return info.tobuf(format=tarfile.PAX_FORMAT)
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % tarfile.BLOCKSIZE)
+
+
+def _stream_file(path: str, size: int) -> Iterator[bytes]:
+    """Yield exactly `size` bytes of a file, zero-filling if it shrank."""
+    remaining = size
+    with open(path, "rb") as f:
+        while remaining:
+            chunk = f.read(min(BUNDLE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    if remaining:
+        yield b"\0" * remaining
+
+
+def _tar_stream(project: Dict[str, Any]) -> Iterator[bytes]:
+    raw = json.dumps(project, indent=4).encode("utf-8")
+    yield _tar_member("project.json", len(raw), 0)
+    yield raw + _padding(len(raw))
+
+    count = 0
+    for arcname, path in _referenced_outputs(project):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        yield _tar_member(arcname, st.st_size, st.st_mtime)
+        yield from _stream_file(path, st.st_size)
+        yield _padding(st.st_size)
+        count += 1
+
+    # End-of-archive marker
+    yield b"\0" * (2 * tarfile.BLOCKSIZE)
+    logging.info(f"[ProjectBundle] Exported project {project.get('project_id')} with {count} files")
+
+
+def export_project(project_id: str, compression: Optional[str] = None) -> Optional[Iterator[bytes]]:
+    """
+    Return a generator streaming a tar bundle of the project: project.json
+    plus every referenced animation/sprite output. Nothing is staged on
+    disk. `compression` may be "zstd" (requires zstandard).
+    Returns None if the project does not exist.
+    Raises BundleError for an unsupported compression.
+    """
+    if compression not in (None, "zstd"):
+        raise BundleError(f"Unsupported compression: {compression}")
+    if compression == "zstd" and not zstd_available():
+        raise BundleError("zstd compression requires the zstandard package")
+
+    project = load_project(os.path.basename(project_id))
+    if project is None:
+        return None
+
+    if compression != "zstd":
+        return _tar_stream(project)
+
+    def compressed():
+        compressor = _zstd().ZstdCompressor().compressobj()
+        for chunk in _tar_stream(project):
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+        yield compressor.flush()
+
+    return compressed()
+
+
+# ----------------------------------------------------------------------
+# Import
+# ----------------------------------------------------------------------
+class _PeekedStream:
+    """A read-only stream with its first bytes already read for sniffing."""
+
+    def __init__(self, stream, head: bytes):
+        self._stream = stream
+        self._head = head
+
+    def read(self, size=-1):
+        if self._head:
+            if size is None or size < 0:
+                data, self._head = self._head + self._stream.read(), b""
+                return data
+            data, self._head = self._head[:size], self._head[size:]
+            if len(data) < size:
+                data += self._stream.read(size - len(data))
+            return data
+        return self._stream.read(size)
+
+
+def _safe_target(name: str):
+    """Map a bundle member name to (folder, path on disk), or raise BundleError."""
+    parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".")]
+    if not parts or ".." in parts or os.path.isabs(name):
+        raise BundleError(f"Unsafe path in bundle: {name}")
+
+    if parts == ["project.json"]:
+        return "project.json", None
+
+    root = BUNDLE_ROOTS.get(parts[0])
+    if root is None or len(parts) < 2:
+        raise BundleError(f"Unexpected entry in bundle: {name}")
+    return parts[0], os.path.join(root, *parts[1:])
+
+
+def _extract_file(fileobj, path: str) -> str:
+    """Copy a member to a temp file next to its target and return the temp path."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp, "wb") as out:
+            shutil.copyfileobj(fileobj, out, BUNDLE_CHUNK_SIZE)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return tmp
+
+
+def _discard(staged):
+    for tmp, _ in staged:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def import_project(stream, overwrite: bool = False) -> Dict[str, Any]:
+    """
+    Import a bundle made by export_project from a readable stream
+    (plain or zstd tar, detected from its first bytes). Members are
+    processed one at a time, so memory stays constant for any bundle size.
+
+    Outputs are staged in temp files and only moved into place once the
+    whole bundle was read. Existing files with the same content are left
+    alone; if any differ, nothing is written and BundleError is raised
+    unless `overwrite` is set, in which case they are replaced and listed
+    under "overwritten".
+    The project is saved last; it keeps its ID unless that ID is taken.
+    Raises BundleError for malformed, unsafe or conflicting bundles.
+    """
+    head = stream.read(4)
+    stream = _PeekedStream(stream, head)
+
+    errors = (tarfile.TarError, ValueError, UnicodeDecodeError)
+    if head == ZSTD_MAGIC:
+        if not zstd_available():
+            raise BundleError("Bundle is zstd-compressed but zstandard is not installed")
+        stream = _zstd().ZstdDecompressor().stream_reader(stream)
+        errors += (_zstd().ZstdError,)
+
+    project = None
+    staged = []
+    try:
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            for member in tar:
+                if member.isdir():
+                    continue
+                if not member.isfile():
+                    raise BundleError(f"Unsupported entry type in bundle: {member.name}")
+
+                folder, path = _safe_target(member.name)
+                fileobj = tar.extractfile(member)
+
+                if folder == "project.json":
+                    if member.size > MAX_PROJECT_JSON_SIZE:
+                        raise BundleError("project.json is too large")
+                    project = json.load(fileobj)
+                    continue
+
+                staged.append((_extract_file(fileobj, path), path))
+    except BundleError:
+        _discard(staged)
+        raise
+    except errors as e:
+        _discard(staged)
+        raise BundleError(f"Invalid bundle: {e}")
+    except Exception:
+        _discard(staged)
+        raise
+
+    if not isinstance(project, dict):
+        _discard(staged)
+        raise BundleError("Bundle does not contain a project.json")
+
+    written, unchanged, conflicts = [], [], []
+    for tmp, path in staged:
+        if os.path.isfile(path) and filecmp.cmp(tmp, path, shallow=False):
+            unchanged.append((tmp, path))
+            continue
+        if os.path.exists(path):
+            conflicts.append(path)
+        written.append((tmp, path))
+
+    if conflicts and not overwrite:
+        _discard(staged)
+        raise BundleError(
+            f"Bundle would overwrite {len(conflicts)} existing file(s) with different content: "
+            + ", ".join(conflicts[:10])
+        )
+
+    _discard(unchanged)
+    for i, (tmp, path) in enumerate(written):
+        try:
+            os.replace(tmp, path)
+        except Exception:
+            _discard(written[i:])
+            raise
+    for path in conflicts:
+        logging.warning(f"[ProjectBundle] Overwrote {path}")
+
+    project_id = project.get("project_id")
+    if not project_id or os.path.basename(project_id) != project_id or \
+            os.path.exists(os.path.join(PROJECT_ROOT, project_id)):
+        project.pop("project_id", None)
+
+    saved = save_project(project)
+    logging.info(f"[ProjectBundle] Imported project {saved['project_id']} with {len(staged)} files")
+
+    return {"project_id": saved["project_id"], "files": len(staged), "overwritten": conflicts}
@@ -0,0 +1,107 @@
+import logging
+from functools import lru_cache
+from string import Formatter
+
+# Variables a prompt template may reference, e.g. "{character} doing a {motion}"
+TEMPLATE_VARIABLES = (
+    "character",
+    "motion",
+    "style",
+    "checkpoint",
+    "lora",
+    "sampler",
+    "cfg_scale"
+)
+
+# Template fields that are compiled and rendered
+TEMPLATE_FIELDS = ("prompt", "negative_prompt")
+
+_FORMATTER = Formatter()
+
+
+class TemplateError(ValueError):
+    """Raised when a template string cannot be compiled."""
+
+
+def _parse(text: str):
+    """
+    Split a template into literal and variable parts.
+    Only bare {name} placeholders are allowed; use {{ and }} for braces.
+    """
+    parts = []
+    try:
+        parsed = list(_FORMATTER.parse(text))
+    except ValueError as e:
+        raise TemplateError(f"Malformed template: {e}")
+
+    for literal, field, spec, conversion in parsed:
+        if literal:
+            parts.append((True, literal))
+        if field is None:
+            continue
+        if spec or conversion:
+            raise TemplateError(f"Format specs are not supported: {{{field}}}")
+        if field not in TEMPLATE_VARIABLES:
+            raise TemplateError(f"Unknown template variable: {{{field}}}")
+        parts.append((False, field))
+
+    return tuple(parts)
+
+
+@lru_cache(maxsize=256)
+def compile_template(text: str):
+    """
+    Compile a template string into a render function.
+
+    Results are cached by the template text itself, so every saved
+    version of a template compiles exactly once.
+    """
+    parts = _parse(text)
+
+    # Static templates render to themselves
+    if all(is_literal for is_literal, _ in parts):
+        static = "".join(value for _, value in parts)
+        return lambda variables: static
+
+    def render(variables: dict):
+        out = []
+        for is_literal, value in parts:
+            if is_literal:
+                out.append(value)
+            else:
+                v = variables.get(value)
+                out.append("" if v is None else str(v))
+        return "".join(out)
+
+    return render
+
+
+def validate_template(data: dict):
+    """Return a list of error messages for a template dict (empty if valid)."""
+    errors = []
+    for field in TEMPLATE_FIELDS:
+        text = data.get(field, "")
+        if not isinstance(text, str):
+            errors.append(f"'{field}' must be a string")
+            continue
+        try:
+            compile_template(text)
+        except TemplateError as e:
+            errors.append(f"{field}: {e}")
+    return errors
+
+
+def render_template(template: dict, variables: dict):
+    """
+    Render a template's prompt and negative prompt.
+    Variables that are missing or None render as empty strings.
+    Returns (prompt, negative_prompt).
+    """
+    try:
+        prompt = compile_template(template.get("prompt", ""))(variables)
+        negative = compile_template(template.get("negative_prompt", ""))(variables)
+    except TemplateError as e:
+        logging.error(f"[Prompts] Template failed to compile: {e}")
+        return template.get("prompt", ""), template.get("negative_prompt", "")
+
+    return prompt, negative
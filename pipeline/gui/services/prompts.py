@@ -1,7 +1,9 @@
-import json
-import os
 import logging
 
+from services.config_cache import load_cached, invalidate
+from services.settings_store import save_entry
+from services.prompt_engine import validate_template
+
 TEMPLATE_PATH = "/workspace/pipeline/workflows/prompt_templates.json"
 
 # Required fields for each prompt template
@@ -20,24 +22,7 @@ def _normalize_template(t: dict):
     return normalized
 
 
-def load_templates():
-    """
-    Loads all prompt templates and returns a dict:
-    {
-        "template_id": { "prompt": "...", "negative_prompt": "..." }
-    }
-    """
-    if not os.path.exists(TEMPLATE_PATH):
-        logging.warning("[Prompts] No template file found.")
-        return {}
-
-    try:
-        with open(TEMPLATE_PATH, "r") as f:
-            data = json.load(f)
-    except Exception as e:
-        logging.error(f"[Prompts] Failed to load template file: {e}")
-        return {}
-
+def _build_templates(data: dict):
     templates = data.get("templates", {})
 
     # Normalize all templates
@@ -47,6 +32,17 @@ def load_templates():
     return normalized
 
 
+def load_templates():
+    """
+    Loads all prompt templates and returns a read-only dict:
+    {
+        "template_id": { "prompt": "...", "negative_prompt": "..." }
+    }
+    The file is only re-read when its mtime changes.
+    """
+    return load_cached(TEMPLATE_PATH, _build_templates, {}, label="Prompts")
+
+
 def get_template(template_id: str):
     """
     Returns a single normalized template.
@@ -64,25 +60,18 @@ def get_template(template_id: str):
 def save_template(template_id: str, data: dict):
     """
     Saves or updates a template.
-    Ensures schema normalization and safe file handling.
+    Ensures schema normalization; the write is atomic and serialized
+    through the settings store (SQLite-backed when enabled).
+    Templates with unknown or malformed variables are rejected.
     """
-    # Load existing file or create new structure
-    if os.path.exists(TEMPLATE_PATH):
-        try:
-            with open(TEMPLATE_PATH, "r") as f:
-                full = json.load(f)
-        except Exception as e:
-            logging.error(f"[Prompts] Failed to read template file: {e}")
-            full = {"templates": {}}
-    else:
-        full = {"templates": {}}
-
-    # Normalize and save
-    full["templates"][template_id] = _normalize_template(data)
+    errors = validate_template(data)
+    if errors:
+        logging.warning(f"[Prompts] Rejected template '{template_id}': {errors}")
+        return False
 
     try:
-        with open(TEMPLATE_PATH, "w") as f:
-            json.dump(full, f, indent=4)
+        save_entry("templates", TEMPLATE_PATH, "templates", template_id, _normalize_template(data))
+        invalidate(TEMPLATE_PATH)
         logging.info(f"[Prompts] Saved template '{template_id}'")
         return True
     except Exception as e:
@@ -0,0 +1,168 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+# Optional SQLite backend. When SPRITEFORGE_SETTINGS_DB is set, writes go
+# through a WAL-mode database and the JSON files become an export that is
+# rewritten after every commit. When unset, the JSON files are the store.
+SETTINGS_DB_PATH = os.environ.get("SPRITEFORGE_SETTINGS_DB")
+
+_LOCAL = threading.local()
+_NAMESPACE_LOCKS = {}
+_NAMESPACE_LOCKS_GUARD = threading.Lock()
+# { namespace: mtime_ns of its JSON file when this process last synced it }
+_JSON_MTIMES = {}
+
+
+# ----------------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------------
+def _atomic_write(path: str, data: dict):
+    """Write JSON atomically to avoid corruption."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, path)
+
+
+def _mtime_ns(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _read_json(path: str):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        logging.error(f"[Settings] Failed to read {path}: {e}")
+        return {}
+
+
+def _namespace_lock(namespace: str):
+    """Return a per-namespace lock, creating it if needed."""
+    with _NAMESPACE_LOCKS_GUARD:
+        if namespace not in _NAMESPACE_LOCKS:
+            _NAMESPACE_LOCKS[namespace] = threading.Lock()
+        return _NAMESPACE_LOCKS[namespace]
+
+
+def sqlite_enabled():
+    return bool(SETTINGS_DB_PATH)
+
+
+def _connect():
+    """One connection per thread; WAL lets readers run alongside a writer."""
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(SETTINGS_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS settings ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " updated TEXT NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        _LOCAL.conn = conn
+    return conn
+
+
+# ----------------------------------------------------------------------
+# SQLite operations
+# ----------------------------------------------------------------------
+def get_all(namespace: str):
+    """Return {key: value} for a namespace from the database."""
+    rows = _connect().execute(
+        "SELECT key, value FROM settings WHERE namespace = ? ORDER BY key",
+        (namespace,)
+    ).fetchall()
+    return {k: json.loads(v) for k, v in rows}
+
+
+def _put_many(namespace: str, entries: dict):
+    """Upsert several keys in one IMMEDIATE transaction."""
+    conn = _connect()
+    now = datetime.utcnow().isoformat()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            "INSERT INTO settings (namespace, key, value, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+            [(namespace, k, json.dumps(v), now) for k, v in entries.items()]
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _sync_from_json(namespace: str, doc: dict, path: str, section):
+    """
+    Import the JSON file into the database unless it is unchanged since
+    this process last wrote or imported it. This seeds the database on
+    first use and picks up hand edits (or file browser edits) made to the
+    export, which would otherwise be overwritten by the next save.
+    """
+    mtime = _mtime_ns(path)
+    if mtime is None or _JSON_MTIMES.get(namespace) == mtime:
+        return
+
+    entries = doc.get(section, {}) if section else doc
+    if isinstance(entries, dict) and entries:
+        _put_many(namespace, entries)
+        logging.info(f"[Settings] Imported {len(entries)} '{namespace}' entries from {path}")
+
+    _JSON_MTIMES[namespace] = mtime
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+def save_entries(namespace: str, path: str, section, entries: dict):
+    """
+    Atomically set several keys of a settings document.
+
+    `section` names the dict inside the JSON file that holds the entries
+    (e.g. "templates"); None means the whole file is the mapping. Other
+    top-level keys in the file are preserved.
+
+    With the SQLite backend the keys are committed to the database first
+    and the JSON file is then re-exported from it; a JSON file edited
+    since the last export is imported before that. Otherwise the JSON
+    file is updated under a lock and replaced atomically.
+    """
+    with _namespace_lock(namespace):
+        doc = _read_json(path)
+
+        if sqlite_enabled():
+            _sync_from_json(namespace, doc, path, section)
+            _put_many(namespace, entries)
+            merged = get_all(namespace)
+        else:
+            merged = dict(doc.get(section, {}) if section else doc)
+            merged.update(entries)
+
+        if section:
+            doc[section] = merged
+        else:
+            doc = merged
+
+        _atomic_write(path, doc)
+        if sqlite_enabled():
+            _JSON_MTIMES[namespace] = _mtime_ns(path)
+
+
+def save_entry(namespace: str, path: str, section, key: str, value):
+    """Atomically set a single key. See save_entries."""
+    save_entries(namespace, path, section, {key: value})
@@ -1,17 +1,295 @@
+import io
 import os
+import time
 import uuid
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from PIL import Image, UnidentifiedImageError
 from datetime import datetime
 import json
 
 SPRITE_OUTPUT_ROOT = "/workspace/sprites"
 
+# Resampling filters accepted for scaled sheet variants
+RESAMPLE_FILTERS = {
+    "nearest": Image.NEAREST,
+    "bilinear": Image.BILINEAR,
+    "lanczos": Image.LANCZOS
+}
 
-def assemble_spritesheet(frames_dir: str, character_name: str):
+MAX_VARIANT_WORKERS = 4
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Palette size bounds for indexed-color output
+MIN_PALETTE_COLORS = 2
+MAX_PALETTE_COLORS = 256
+
+
+def _file_hash(path: str):
+    """SHA-256 of a frame file's bytes, computed without decoding it."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load_previous_metadata(output_dir: str):
+    """Load metadata.json from an earlier run, or None if unavailable."""
+    path = os.path.join(output_dir, "metadata.json")
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        logging.error(f"[SpriteForge] Failed to read previous metadata {path}: {e}")
+        return None
+
+
+def _open_previous_sheet(path, expected_size):
+    """Open a previous sheet for in-place repainting if its size still fits."""
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        sheet = Image.open(path).convert("RGBA")
+    except (OSError, UnidentifiedImageError):
+        logging.warning(f"[SpriteForge] Previous sheet unreadable, rebuilding: {path}")
+        return None
+
+    if expected_size is not None and sheet.size != expected_size:
+        return None
+
+    return sheet
+
+
+# ----------------------------------------------------------------------
+# Frame deduplication
+# ----------------------------------------------------------------------
+def _dedup_frames(images: list, tolerance: int = 0):
+    """
+    Collapses duplicate frames into unique atlas cells.
+
+    Exact duplicates are found by hashing the raw RGBA pixels. When
+    tolerance > 0, a frame is also merged into an earlier cell if no
+    channel of any pixel differs by more than `tolerance` (0-255).
+
+    Returns (cells, frame_map) where cells is the list of unique images
+    and frame_map[i] is the cell index used by animation frame i.
+    """
+    cells = []
+    cell_arrays = []
+    frame_map = []
+    by_hash = {}
+
+    for img in images:
+        digest = hashlib.sha1(img.tobytes()).hexdigest()
+        if digest in by_hash:
+            frame_map.append(by_hash[digest])
+            continue
+
+        match = None
+        if tolerance > 0:
+            arr = np.asarray(img, dtype=np.int16)
+            for idx, other in enumerate(cell_arrays):
+                if np.abs(arr - other).max() <= tolerance:
+                    match = idx
+                    break
+
+        if match is None:
+            match = len(cells)
+            cells.append(img)
+            if tolerance > 0:
+                cell_arrays.append(arr)
+
+        by_hash[digest] = match
+        frame_map.append(match)
+
+    return cells, frame_map
+
+
+# ----------------------------------------------------------------------
+# Sheet building
+# ----------------------------------------------------------------------
+def _build_sheet(cells: list, frame_width: int, frame_height: int, base=None, dirty=None):
+    """
+    Paste cells left-to-right into a single-row RGBA sheet.
+
+    When `base` is a previous sheet of the same size, only the cell
+    indices in `dirty` are repainted on top of it.
+    """
+    size = (frame_width * len(cells), frame_height)
+
+    if base is not None and dirty is not None and base.size == size:
+        sheet = base
+        indices = sorted(dirty)
+    else:
+        sheet = Image.new("RGBA", size)
+        indices = range(len(cells))
+
+    for i in indices:
+        sheet.paste(cells[i], (i * frame_width, 0))
+
+    return sheet
+
+
+def _quantize_sheet(sheet, palette_colors: int):
+    """
+    Quantize an RGBA sheet to a single shared palette, keeping alpha.
+
+    Fully transparent pixels are cleared to black first so they collapse
+    into one palette entry instead of eating into the colour budget.
+    """
+    arr = np.array(sheet)
+    arr[arr[:, :, 3] == 0] = 0
+    cleared = Image.fromarray(arr, "RGBA")
+
+    return cleared.quantize(
+        colors=palette_colors,
+        method=Image.Quantize.FASTOCTREE,
+        dither=Image.Dither.NONE
+    )
+
+
+def _save_sheet(sheet, sheet_path: str, palette_colors: int | None = None):
+    """
+    Save a sheet as RGBA, or as indexed colour when palette_colors is set.
+
+    In indexed mode the RGBA encoding is also timed in memory and a
+    size / encode-time / texture-memory comparison is returned.
+    """
+    if not palette_colors:
+        sheet.save(sheet_path)
+        return None
+
+    start = time.perf_counter()
+    rgba_buf = io.BytesIO()
+    sheet.save(rgba_buf, format="PNG")
+    rgba_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    indexed = _quantize_sheet(sheet, palette_colors)
+    indexed.save(sheet_path, optimize=True)
+    indexed_ms = (time.perf_counter() - start) * 1000
+
+    rgba_bytes = rgba_buf.getbuffer().nbytes
+    indexed_bytes = os.path.getsize(sheet_path)
+    palette_used = len(indexed.getcolors(MAX_PALETTE_COLORS) or [])
+    width, height = sheet.size
+
+    return {
+        "mode": "indexed",
+        "palette_colors": palette_colors,
+        "palette_used": palette_used,
+        "rgba": {
+            "file_bytes": rgba_bytes,
+            "encode_ms": round(rgba_ms, 2),
+            "memory_bytes": width * height * 4
+        },
+        "indexed": {
+            "file_bytes": indexed_bytes,
+            "encode_ms": round(indexed_ms, 2),
+            "memory_bytes": width * height + palette_colors * 4
+        },
+        "size_ratio": round(rgba_bytes / indexed_bytes, 2) if indexed_bytes else None
+    }
+
+
+def _scale_label(scale: float):
+    """Format a scale factor for file names, e.g. 0.5 -> '0.5x'."""
+    return f"{scale:g}x"
+
+
+def _build_variant(cells, scale, frame_width, frame_height, resample,
+                   output_dir, character_name, base_metadata,
+                   dirty=None, previous_path=None, palette_colors=None):
+    """
+    Resamples the decoded cells to `scale` and writes the variant sheet
+    plus its own metadata file. Runs in a worker thread.
+
+    On incremental rebuilds only the `dirty` cells are resampled and
+    repainted onto the previous variant sheet.
+    """
+    label = _scale_label(scale)
+    width = max(1, round(frame_width * scale))
+    height = max(1, round(frame_height * scale))
+
+    base = None
+    if dirty is not None:
+        base = _open_previous_sheet(previous_path, (width * len(cells), height))
+
+    if base is not None:
+        scaled = [
+            img.resize((width, height), resample) if i in dirty else None
+            for i, img in enumerate(cells)
+        ]
+    else:
+        scaled = [img.resize((width, height), resample) for img in cells]
+
+    sheet = _build_sheet(scaled, width, height, base, dirty)
+
+    sheet_path = os.path.join(output_dir, f"{character_name}_sheet@{label}.png")
+    encoding = _save_sheet(sheet, sheet_path, palette_colors)
+
+    metadata = {
+        **base_metadata,
+        "scale": scale,
+        "frame_width": width,
+        "frame_height": height,
+        "sheet_path": sheet_path,
+        "encoding": encoding
+    }
+
+    metadata_path = os.path.join(output_dir, f"metadata@{label}.json")
+    with open(metadata_path, "w") as f:
+        json.dump(metadata, f, indent=4)
+
+    logging.info(f"[SpriteForge] Sprite sheet variant {label} created: {sheet_path}")
+
+    return {
+        "scale": scale,
+        "frame_width": width,
+        "frame_height": height,
+        "sheet_path": sheet_path,
+        "metadata_path": metadata_path
+    }
+
+
+def assemble_spritesheet(
+    frames_dir: str,
+    character_name: str,
+    dedup: bool = False,
+    dedup_tolerance: int = 0,
+    scales: list | None = None,
+    resample: str = "lanczos",
+    run_id: str | None = None,
+    palette_colors: int | None = None
+):
     """
     Takes a directory of frames and assembles them into a sprite sheet.
     Returns paths to the sheet and metadata.
+
+    With dedup enabled, identical (or, with dedup_tolerance, nearly
+    identical) frames share a single atlas cell and metadata.json maps
+    each animation frame to its cell.
+
+    `scales` (e.g. [0.5, 0.25]) produces additional downscaled variants
+    from the same decoded frames, each with its own sheet and metadata.
+
+    Passing the `run_id` of an earlier sheet rebuilds it in place: frames
+    whose content hash is unchanged are copied from the previous sheet,
+    and only changed frames are decoded and repainted.
+
+    `palette_colors` switches output to indexed colour: every sheet is
+    quantized to one shared palette of that size (alpha preserved) and
+    metadata["encoding"] compares it with plain RGBA. Indexed sheets are
+    always rebuilt from the original frames, even with `run_id`: cells
+    cropped from a quantized sheet would be quantized again and drift.
     """
 
     # ----------------------------------------------------------------------
@@ -24,9 +302,43 @@ def assemble_spritesheet(frames_dir: str, character_name: str):
             "frames_dir": frames_dir
         }
 
-    run_id = str(uuid.uuid4())[:8]
-    output_dir = os.path.join(SPRITE_OUTPUT_ROOT, run_id)
-    os.makedirs(output_dir, exist_ok=True)
+    variant_scales = sorted({float(x) for x in (scales or []) if float(x) != 1.0}, reverse=True)
+    if any(x <= 0 for x in variant_scales):
+        return {
+            "status": "error",
+            "message": "Sheet scales must be positive",
+            "frames_dir": frames_dir
+        }
+
+    if resample not in RESAMPLE_FILTERS:
+        return {
+            "status": "error",
+            "message": f"Unknown resample filter: {resample}",
+            "frames_dir": frames_dir
+        }
+
+    if palette_colors is not None and not MIN_PALETTE_COLORS <= palette_colors <= MAX_PALETTE_COLORS:
+        return {
+            "status": "error",
+            "message": f"palette_colors must be between {MIN_PALETTE_COLORS} and {MAX_PALETTE_COLORS}",
+            "frames_dir": frames_dir
+        }
+
+    previous = None
+    if run_id:
+        run_id = os.path.basename(run_id)
+        output_dir = os.path.join(SPRITE_OUTPUT_ROOT, run_id)
+        previous = _load_previous_metadata(output_dir)
+        if previous is None:
+            return {
+                "status": "error",
+                "message": f"No existing sprite sheet for run: {run_id}",
+                "frames_dir": frames_dir
+            }
+    else:
+        run_id = str(uuid.uuid4())[:8]
+        output_dir = os.path.join(SPRITE_OUTPUT_ROOT, run_id)
+        os.makedirs(output_dir, exist_ok=True)
 
     logging.info(f"[SpriteForge] Assembling sprite sheet for {character_name} from {frames_dir}")
 
@@ -50,14 +362,61 @@ def assemble_spritesheet(frames_dir: str, character_name: str):
     if any(f.lower().endswith(".jpg") or f.lower().endswith(".jpeg") for f in frame_files):
         logging.warning("[SpriteForge] JPEG frames detected — transparency may be lost.")
 
+    # ----------------------------------------------------------------------
+    # Hash frames and decide which ones can be reused from the last build
+    # ----------------------------------------------------------------------
+    frame_hashes = [_file_hash(f) for f in frame_files]
+
+    # Previous sheets are only reusable when built with the same options
+    if previous and (
+        previous.get("dedup") != {"enabled": bool(dedup), "tolerance": int(dedup_tolerance) if dedup else 0}
+        or previous.get("resample", "lanczos") != resample
+        or previous.get("palette_colors") != palette_colors
+    ):
+        logging.info("[SpriteForge] Sheet options changed, doing a full rebuild")
+        previous = None
+
+    # Quantized sheets no longer hold the original pixels, so reusing
+    # their cells would re-quantize them on every rebuild
+    if previous and palette_colors:
+        logging.info("[SpriteForge] Indexed-colour sheet, doing a full rebuild")
+        previous = None
+
+    prev_hashes = previous.get("frame_hashes", []) if previous else []
+    prev_map = previous.get("frame_map", []) if previous else []
+    prev_sheet = None
+    if prev_hashes:
+        prev_sheet = _open_previous_sheet(previous.get("sheet_path"), None)
+
+    # With a dedup tolerance a cell holds the pixels of the frame that first
+    # filled it, so only that frame can be cropped back out of it
+    exact_cells = not dedup or int(dedup_tolerance) <= 0
+    prev_first_frame = {}
+    for i, cell in enumerate(prev_map):
+        prev_first_frame.setdefault(cell, i)
+
     # ----------------------------------------------------------------------
     # Load images safely
     # ----------------------------------------------------------------------
     images = []
-    for f in frame_files:
+    reused = []
+    for i, f in enumerate(frame_files):
+        if (
+            prev_sheet is not None
+            and i < len(prev_hashes) and i < len(prev_map)
+            and prev_hashes[i] == frame_hashes[i]
+            and (exact_cells or prev_first_frame.get(prev_map[i]) == i)
+        ):
+            w, h = previous["frame_width"], previous["frame_height"]
+            cell = prev_map[i]
+            images.append(prev_sheet.crop((cell * w, 0, (cell + 1) * w, h)))
+            reused.append(True)
+            continue
+
         try:
             img = Image.open(f).convert("RGBA")
             images.append(img)
+            reused.append(False)
         except UnidentifiedImageError:
             logging.error(f"[SpriteForge] Corrupted or unreadable frame: {f}")
             return {
@@ -83,21 +442,59 @@ def assemble_spritesheet(frames_dir: str, character_name: str):
     logging.info(f"[SpriteForge] {num_frames} frames loaded ({frame_width}x{frame_height})")
 
     # ----------------------------------------------------------------------
-    # Create sheet (single row for now)
+    # Deduplicate frames
     # ----------------------------------------------------------------------
-    sheet_width = frame_width * num_frames
-    sheet_height = frame_height
+    if dedup:
+        cells, frame_map = _dedup_frames(images, max(0, int(dedup_tolerance)))
+        logging.info(
+            f"[SpriteForge] Dedup: {num_frames} frames -> {len(cells)} unique cells "
+            f"(tolerance={dedup_tolerance})"
+        )
+    else:
+        cells, frame_map = images, list(range(num_frames))
 
-    sheet = Image.new("RGBA", (sheet_width, sheet_height))
+    num_cells = len(cells)
 
-    for i, img in enumerate(images):
-        sheet.paste(img, (i * frame_width, 0))
+    # ----------------------------------------------------------------------
+    # Work out which cells must be repainted
+    # ----------------------------------------------------------------------
+    # A cell is clean when its source frame was reused and it sits in the
+    # same atlas slot as before; everything else is repainted.
+    dirty = None
+    if prev_sheet is not None:
+        cell_sources = {}
+        for i, cell in enumerate(frame_map):
+            cell_sources.setdefault(cell, i)
+
+        if prev_sheet.size == (frame_width * num_cells, frame_height):
+            dirty = {
+                cell for cell, src in cell_sources.items()
+                if not reused[src] or prev_map[src] != cell
+            }
+        else:
+            dirty = set(range(num_cells))
+
+        logging.info(
+            f"[SpriteForge] Incremental rebuild: {sum(reused)}/{num_frames} frames reused, "
+            f"{len(dirty)}/{num_cells} cells repainted"
+        )
+
+    # ----------------------------------------------------------------------
+    # Create sheet (single row for now)
+    # ----------------------------------------------------------------------
+    sheet = _build_sheet(cells, frame_width, frame_height, prev_sheet, dirty)
 
     # ----------------------------------------------------------------------
     # Save sheet
     # ----------------------------------------------------------------------
     sheet_path = os.path.join(output_dir, f"{character_name}_sheet.png")
-    sheet.save(sheet_path)
+    encoding = _save_sheet(sheet, sheet_path, palette_colors)
+
+    if encoding:
+        logging.info(
+            f"[SpriteForge] Indexed sheet: {encoding['indexed']['file_bytes']} bytes "
+            f"vs {encoding['rgba']['file_bytes']} bytes RGBA ({encoding['palette_used']} colours)"
+        )
 
     # ----------------------------------------------------------------------
     # Metadata
@@ -108,11 +505,50 @@ def assemble_spritesheet(frames_dir: str, character_name: str):
         "frame_width": frame_width,
         "frame_height": frame_height,
         "num_frames": num_frames,
+        "num_cells": num_cells,
+        "frame_map": frame_map,
+        "dedup": {
+            "enabled": bool(dedup),
+            "tolerance": int(dedup_tolerance) if dedup else 0
+        },
+        "resample": resample,
+        "palette_colors": palette_colors,
+        "encoding": encoding,
         "frames_dir": frames_dir,
+        "frame_files": [os.path.basename(f) for f in frame_files],
+        "frame_hashes": frame_hashes,
         "sheet_path": sheet_path,
         "timestamp": datetime.utcnow().isoformat()
     }
 
+    if dirty is not None:
+        metadata["rebuild"] = {
+            "reused_frames": sum(reused),
+            "repainted_cells": len(dirty)
+        }
+
+    # ----------------------------------------------------------------------
+    # Scaled variants (resampled in parallel from the decoded cells)
+    # ----------------------------------------------------------------------
+    if variant_scales:
+        previous_variants = {
+            v.get("scale"): v.get("sheet_path")
+            for v in (previous or {}).get("variants", [])
+        }
+
+        with ThreadPoolExecutor(max_workers=min(MAX_VARIANT_WORKERS, len(variant_scales))) as pool:
+            futures = [
+                pool.submit(
+                    _build_variant, cells, scale, frame_width, frame_height,
+                    RESAMPLE_FILTERS[resample], output_dir, character_name, metadata,
+                    dirty, previous_variants.get(scale), palette_colors
+                )
+                for scale in variant_scales
+            ]
+            variants = [fut.result() for fut in futures]
+
+        metadata["variants"] = variants
+
     metadata_path = os.path.join(output_dir, "metadata.json")
     with open(metadata_path, "w") as f:
         json.dump(metadata, f, indent=4)
@@ -123,6 +559,7 @@ def assemble_spritesheet(frames_dir: str, character_name: str):
         "status": "success",
         "run_id": run_id,
         "sheet": sheet_path,
+        "variants": metadata.get("variants", []),
         "metadata": metadata,
         "metadata_path": metadata_path,
         "output_dir": output_dir
@@ -1,7 +1,8 @@
-import json
-import os
 import logging
 
+from services.config_cache import load_cached, invalidate
+from services.settings_store import save_entry
+
 STYLE_PRESET_PATH = "/workspace/pipeline/workflows/style_presets.json"
 
 # Required fields for each style preset
@@ -26,25 +27,7 @@ def _normalize_preset(preset: dict):
     return normalized
 
 
-def load_style_presets():
-    """
-    Loads the style preset file and returns:
-    {
-        "default": <default_style_id>,
-        "presets": { ...normalized presets... }
-    }
-    """
-    if not os.path.exists(STYLE_PRESET_PATH):
-        logging.warning("[Styles] No style preset file found.")
-        return {"default": None, "presets": {}}
-
-    try:
-        with open(STYLE_PRESET_PATH, "r") as f:
-            data = json.load(f)
-    except Exception as e:
-        logging.error(f"[Styles] Failed to load style presets: {e}")
-        return {"default": None, "presets": {}}
-
+def _build_presets(data: dict):
     presets = data.get("presets", {})
     default = data.get("default")
 
@@ -59,6 +42,23 @@ def load_style_presets():
     }
 
 
+def load_style_presets():
+    """
+    Loads the style preset file and returns a read-only view of:
+    {
+        "default": <default_style_id>,
+        "presets": { ...normalized presets... }
+    }
+    The file is only re-read when its mtime changes.
+    """
+    return load_cached(
+        STYLE_PRESET_PATH,
+        _build_presets,
+        {"default": None, "presets": {}},
+        label="Styles"
+    )
+
+
 def get_style_preset(style_id: str):
     """
     Returns a single normalized style preset.
@@ -72,3 +72,18 @@ def get_style_preset(style_id: str):
         return None
 
     return preset
+
+
+def save_style_preset(style_id: str, data: dict):
+    """
+    Saves or updates a style preset.
+    The write is atomic and serialized through the settings store.
+    """
+    try:
+        save_entry("presets", STYLE_PRESET_PATH, "presets", style_id, _normalize_preset(data))
+        invalidate(STYLE_PRESET_PATH)
+        logging.info(f"[Styles] Saved style preset '{style_id}'")
+        return True
+    except Exception as e:
+        logging.error(f"[Styles] Failed to save style preset '{style_id}': {e}")
+        return False
@@ -1,6 +1,12 @@
 import os
 import json
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .graph_validator import analyze_graph
+from .workflow_format import is_api_format, api_to_ui, ui_to_api
+from .node_catalog import required_inputs, check_workflow
 
 WORKFLOW_DIR = "pipeline/workflows"
 MODEL_DIR = "/workspace/models"
@@ -9,6 +15,9 @@ TEMPLATE_PATH = os.path.join(WORKFLOW_DIR, "prompt_templates.json")
 MANIFEST_PATH = os.path.join(WORKFLOW_DIR, "workflow_manifest.json")
 ACTIVE_MODELS_PATH = os.path.join(WORKFLOW_DIR, "active_models.json")
 
+# Threads used for manifest workflows and batched model file stats
+MAX_VALIDATION_WORKERS = 8
+
 
 # ----------------------------------------------------------------------
 # Utility helpers
@@ -29,8 +38,33 @@ def _load_json(path, errors, file_label=None):
         return None
 
 
-def _file_exists(path):
-    return os.path.exists(path) and os.path.isfile(path)
+class _StatCache:
+    """
+    Per-run cache of file-existence checks. Paths can be prefetched in
+    one parallel batch so slow network-volume stats overlap.
+    """
+
+    def __init__(self):
+        self._known = {}
+
+    def prefetch(self, paths):
+        todo = [p for p in set(paths) if p not in self._known]
+        if not todo:
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_VALIDATION_WORKERS, len(todo))) as pool:
+            for path, exists in zip(todo, pool.map(os.path.isfile, todo)):
+                self._known[path] = exists
+
+    def exists(self, path):
+        if path not in self._known:
+            self._known[path] = os.path.isfile(path)
+        return self._known[path]
+
+
+def _file_exists(path, stats=None):
+    if stats is not None:
+        return stats.exists(path)
+    return os.path.isfile(path)
 
 
 # ----------------------------------------------------------------------
@@ -41,6 +75,10 @@ def validate_workflow(path, errors):
     if not data:
         return
 
+    # API-format workflows are checked in the editor layout
+    if is_api_format(data):
+        data = api_to_ui(data)
+
     # Required top-level fields
     if "nodes" not in data:
         errors.append({"file": path, "message": "Missing 'nodes' field"})
@@ -55,15 +93,12 @@ def validate_workflow(path, errors):
         return
 
     # Validate node structure
-    node_ids = set()
     for node in nodes:
         nid = node.get("id")
         if nid is None:
             errors.append({"file": path, "message": "Node missing 'id'"})
             continue
 
-        node_ids.add(str(nid))
-
         if "type" not in node:
             errors.append({"file": path, "message": f"Node {nid} missing 'type'"})
 
@@ -73,26 +108,28 @@ def validate_workflow(path, errors):
         if "outputs" not in node:
             errors.append({"file": path, "message": f"Node {nid} missing 'outputs'"})
 
-    # Validate connections
-    for conn in data["connections"]:
-        if len(conn) < 4:
-            errors.append({"file": path, "message": f"Invalid connection format: {conn}"})
-            continue
-
-        src, src_out, dst, dst_in = conn[:4]
-
-        if str(src) not in node_ids:
-            errors.append({"file": path, "message": f"Connection references missing source node {src}"})
+    # Validate connections and graph shape (cycles, duplicates, reachability)
+    report = analyze_graph(data, required_inputs=required_inputs)
+    for message in report["errors"]:
+        errors.append({"file": path, "message": message})
 
-        if str(dst) not in node_ids:
-            errors.append({"file": path, "message": f"Connection references missing destination node {dst}"})
+    # Node types, input names and enum values from the ComfyUI catalog
+    for message in check_workflow(ui_to_api(data), check_required=False):
+        errors.append({"file": path, "message": message})
+    for message in report["warnings"]:
+        errors.append({"file": path, "message": message, "level": "warning"})
 
 
 # ----------------------------------------------------------------------
 # Style preset validation
 # ----------------------------------------------------------------------
-def validate_style_presets(errors):
-    data = _load_json(PRESET_PATH, errors, "style_presets.json")
+def validate_style_presets(errors, templates=None, stats=None, preset_path=PRESET_PATH):
+    """
+    Validate style presets. `templates` is the already-loaded
+    prompt_templates.json (loaded here once if not given); `stats` is a
+    shared _StatCache.
+    """
+    data = _load_json(preset_path, errors, "style_presets.json")
     if not data:
         return
 
@@ -101,12 +138,24 @@ def validate_style_presets(errors):
         errors.append({"file": "style_presets.json", "message": "'presets' must be a dict"})
         return
 
+    # Stat every referenced model file in one parallel batch
+    stats = stats or _StatCache()
+    stats.prefetch(
+        os.path.join(MODEL_DIR, p)
+        for preset in presets.values()
+        for p in [preset.get("model")] + list(preset.get("loras", []))
+        if p
+    )
+
+    if templates is None and any(p.get("template") for p in presets.values()):
+        templates = _load_json(TEMPLATE_PATH, errors, "prompt_templates.json")
+
     for preset_id, preset in presets.items():
         # Model path
         model_path = preset.get("model")
         if model_path:
             full_path = os.path.join(MODEL_DIR, model_path)
-            if not _file_exists(full_path):
+            if not _file_exists(full_path, stats):
                 errors.append({
                     "file": "style_presets.json",
                     "message": f"Preset '{preset_id}' references missing model: {full_path}"
@@ -116,7 +165,7 @@ def validate_style_presets(errors):
         loras = preset.get("loras", [])
         for lora in loras:
             full_path = os.path.join(MODEL_DIR, lora)
-            if not _file_exists(full_path):
+            if not _file_exists(full_path, stats):
                 errors.append({
                     "file": "style_presets.json",
                     "message": f"Preset '{preset_id}' references missing LoRA: {full_path}"
@@ -125,7 +174,6 @@ def validate_style_presets(errors):
         # Prompt template reference
         template_id = preset.get("template")
         if template_id:
-            templates = _load_json(TEMPLATE_PATH, errors, "prompt_templates.json")
             if templates and template_id not in templates.get("templates", {}):
                 errors.append({
                     "file": "style_presets.json",
@@ -136,8 +184,10 @@ def validate_style_presets(errors):
 # ----------------------------------------------------------------------
 # Prompt template validation
 # ----------------------------------------------------------------------
-def validate_prompt_templates(errors):
-    data = _load_json(TEMPLATE_PATH, errors, "prompt_templates.json")
+def validate_prompt_templates(errors, data=None, template_path=TEMPLATE_PATH):
+    """Validate prompt templates; `data` may be the already-loaded file."""
+    if data is None:
+        data = _load_json(template_path, errors, "prompt_templates.json")
     if not data:
         return
 
@@ -156,8 +206,19 @@ def validate_prompt_templates(errors):
 # ----------------------------------------------------------------------
 # Workflow manifest validation
 # ----------------------------------------------------------------------
-def validate_manifest(errors):
-    data = _load_json(MANIFEST_PATH, errors, "workflow_manifest.json")
+def _validate_workflow_isolated(path):
+    """Validate one workflow into its own error list (thread-safe)."""
+    errors = []
+    validate_workflow(path, errors)
+    return errors
+
+
+def validate_manifest(errors, workflow_dir=WORKFLOW_DIR):
+    """
+    Validate every workflow listed in the manifest. Workflows are checked
+    in parallel; errors are reported in manifest order.
+    """
+    data = _load_json(os.path.join(workflow_dir, "workflow_manifest.json"), errors, "workflow_manifest.json")
     if not data:
         return
 
@@ -166,33 +227,43 @@ def validate_manifest(errors):
         errors.append({"file": "workflow_manifest.json", "message": "'workflows' must be a list"})
         return
 
+    paths = []
     for entry in workflows:
         path = entry.get("file")
         if not path:
             errors.append({"file": "workflow_manifest.json", "message": "Workflow entry missing 'file'"})
             continue
 
-        full_path = os.path.join(WORKFLOW_DIR, path)
-        validate_workflow(full_path, errors)
+        paths.append(os.path.join(workflow_dir, path))
+
+    if not paths:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(MAX_VALIDATION_WORKERS, len(paths))) as pool:
+        for result in pool.map(_validate_workflow_isolated, paths):
+            errors.extend(result)
 
 
 # ----------------------------------------------------------------------
 # Active models validation
 # ----------------------------------------------------------------------
-def validate_active_models(errors):
-    if not os.path.exists(ACTIVE_MODELS_PATH):
+def validate_active_models(errors, stats=None, active_models_path=ACTIVE_MODELS_PATH):
+    if not os.path.exists(active_models_path):
         return  # optional file
 
-    data = _load_json(ACTIVE_MODELS_PATH, errors, "active_models.json")
+    data = _load_json(active_models_path, errors, "active_models.json")
     if not data:
         return
 
     models = data.get("models", [])
+    stats = stats or _StatCache()
+    stats.prefetch(os.path.join(MODEL_DIR, m["path"]) for m in models if m.get("path"))
+
     for model in models:
         path = model.get("path")
         if path:
             full_path = os.path.join(MODEL_DIR, path)
-            if not _file_exists(full_path):
+            if not _file_exists(full_path, stats):
                 errors.append({
                     "file": "active_models.json",
                     "message": f"Missing model file: {full_path}"
@@ -202,16 +273,41 @@ def validate_active_models(errors):
 # ----------------------------------------------------------------------
 # Master validator
 # ----------------------------------------------------------------------
-def validate_all():
+def validate_all(workflow_dir=WORKFLOW_DIR):
+    """
+    Validate the whole pipeline tree. Each config file is loaded once,
+    model file stats are shared across checks, and manifest workflows
+    are validated in parallel. Returns per-stage timings in ms.
+    """
     errors = []
+    timings = {}
+    stats = _StatCache()
+    start = time.perf_counter()
+
+    def timed(stage, func, *args, **kwargs):
+        t0 = time.perf_counter()
+        func(*args, **kwargs)
+        timings[stage] = round((time.perf_counter() - t0) * 1000, 2)
+
+    template_path = os.path.join(workflow_dir, "prompt_templates.json")
+    templates = _load_json(template_path, errors, "prompt_templates.json")
 
     # Validate core workflow files
-    validate_manifest(errors)
-    validate_style_presets(errors)
-    validate_prompt_templates(errors)
-    validate_active_models(errors)
+    timed("manifest", validate_manifest, errors, workflow_dir)
+    timed("style_presets", validate_style_presets, errors, templates or {}, stats,
+          os.path.join(workflow_dir, "style_presets.json"))
+    if templates:
+        timed("prompt_templates", validate_prompt_templates, errors, templates)
+    timed("active_models", validate_active_models, errors, stats,
+          os.path.join(workflow_dir, "active_models.json"))
+
+    failed = [e for e in errors if e.get("level") != "warning"]
+    elapsed = round((time.perf_counter() - start) * 1000, 2)
+    logging.info(f"[Validator] Validated {workflow_dir} in {elapsed} ms ({len(failed)} errors)")
 
     return {
-        "status": "ok" if not errors else "error",
-        "errors": errors
+        "status": "ok" if not failed else "error",
+        "errors": errors,
+        "timings": timings,
+        "elapsed_ms": elapsed
     }
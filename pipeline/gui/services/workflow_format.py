@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from .config_cache import freeze
+
+# Compiled API-format workflows kept in memory, keyed by content hash
+MAX_COMPILED_WORKFLOWS = 64
+
+# { content_hash: frozen API-format workflow }
+_COMPILED = OrderedDict()
+# { path: ((mtime_ns, size), content_hash) }
+_FILE_HASHES = {}
+_LOCK = threading.Lock()
+
+
+# ----------------------------------------------------------------------
+# Format detection
+# ----------------------------------------------------------------------
+def is_api_format(data) -> bool:
+    """API format: {"<node id>": {"class_type": ..., "inputs": {...}}, ...}"""
+    if not isinstance(data, dict) or not data or "nodes" in data:
+        return False
+    return all(isinstance(node, dict) and "class_type" in node for node in data.values())
+
+
+def _is_link(value) -> bool:
+    return (
+        isinstance(value, (list, tuple))
+        and len(value) == 2
+        and isinstance(value[1], int)
+        and not isinstance(value[0], (list, tuple, dict))
+    )
+
+
+def _node_key(nid):
+    """Sort numeric IDs numerically and everything else after them."""
+    s = str(nid)
+    return (0, int(s), "") if s.lstrip("-").isdigit() else (1, 0, s)
+
+
+def _ui_id(nid):
+    s = str(nid)
+    return int(s) if s.lstrip("-").isdigit() else s
+
+
+# ----------------------------------------------------------------------
+# Conversion
+# ----------------------------------------------------------------------
+def ui_to_api(data: dict) -> dict:
+    """
+    Convert an editor (nodes/connections) workflow to ComfyUI API format.
+
+    Inline [node_id, slot] input values become API links. Connections
+    whose destination input is a name set that input; integer slots fill
+    the input at that position when it is not already linked.
+    """
+    nodes = data.get("nodes", [])
+    if isinstance(nodes, dict):
+        nodes = [dict(node, id=node.get("id", nid)) for nid, node in nodes.items()]
+
+    api = {}
+    for node in nodes:
+        nid = str(node.get("id"))
+        if nid in api:
+            continue
+
+        inputs = {}
+        for name, value in (node.get("inputs") or {}).items():
+            inputs[name] = [str(value[0]), value[1]] if _is_link(value) else value
+
+        entry = {"class_type": node.get("type") or node.get("class_type"), "inputs": inputs}
+        if node.get("title"):
+            entry["_meta"] = {"title": node["title"]}
+        api[nid] = entry
+
+    for conn in data.get("connections", []):
+        if not isinstance(conn, (list, tuple)) or len(conn) < 4:
+            continue
+
+        src, src_out, dst, dst_in = conn[:4]
+        src, dst = str(src), str(dst)
+        if src not in api or dst not in api:
+            continue
+
+        inputs = api[dst]["inputs"]
+        link = [src, src_out]
+
+        if isinstance(dst_in, str):
+            inputs[dst_in] = link
+        elif isinstance(dst_in, int) and link not in inputs.values():
+            names = list(inputs)
+            if 0 <= dst_in < len(names) and not _is_link(inputs[names[dst_in]]):
+                inputs[names[dst_in]] = link
+
+    return api
+
+
+def api_to_ui(data: dict) -> dict:
+    """
+    Convert a ComfyUI API-format workflow to the editor layout.
+    Links stay inline in the node inputs and are also listed in
+    'connections' as [src, src_output, dst, input_name].
+    """
+    nodes = []
+    connections = []
+
+    for nid in sorted(data, key=_node_key):
+        node = data[nid]
+        inputs = {}
+        for name, value in (node.get("inputs") or {}).items():
+            if _is_link(value) and str(value[0]) in data:
+                src = _ui_id(value[0])
+                inputs[name] = [src, value[1]]
+                connections.append([src, value[1], _ui_id(nid), name])
+            else:
+                inputs[name] = value
+
+        entry = {"id": _ui_id(nid), "type": node.get("class_type"), "inputs": inputs, "outputs": {}}
+        title = (node.get("_meta") or {}).get("title")
+        if title:
+            entry["title"] = title
+        nodes.append(entry)
+
+    return {"nodes": nodes, "connections": connections}
+
+
+def to_api(data: dict) -> dict:
+    return data if is_api_format(data) else ui_to_api(data)
+
+
+def to_ui(data: dict) -> dict:
+    return api_to_ui(data) if is_api_format(data) else data
+
+
+# ----------------------------------------------------------------------
+# Compiled cache
+# ----------------------------------------------------------------------
+def content_hash(data: dict) -> str:
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _compile(digest: str, data: dict):
+    with _LOCK:
+        compiled = _COMPILED.get(digest)
+        if compiled is not None:
+            _COMPILED.move_to_end(digest)
+            return compiled
+
+    compiled = freeze(to_api(data))
+
+    with _LOCK:
+        _COMPILED[digest] = compiled
+        while len(_COMPILED) > MAX_COMPILED_WORKFLOWS:
+            _COMPILED.popitem(last=False)
+
+    return compiled
+
+
+def compile_workflow(data: dict):
+    """
+    Return the read-only API-format form of a workflow (either format),
+    converting it only the first time its content is seen.
+    """
+    return _compile(content_hash(data), data)
+
+
+def load_compiled(path: str):
+    """
+    Return the compiled API-format workflow for a file. The file is only
+    read and hashed again when its mtime or size changed.
+    Returns None if the file is missing or invalid.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        logging.warning(f"[WorkflowFormat] Workflow not found: {path}")
+        return None
+
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _LOCK:
+        known = _FILE_HASHES.get(path)
+        if known and known[0] == stamp and known[1] in _COMPILED:
+            _COMPILED.move_to_end(known[1])
+            return _COMPILED[known[1]]
+
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except Exception as e:
+        logging.error(f"[WorkflowFormat] Failed to load workflow {path}: {e}")
+        return None
+
+    digest = content_hash(data)
+    compiled = _compile(digest, data)
+
+    with _LOCK:
+        _FILE_HASHES[path] = (stamp, digest)
+
+    return compiled
@@ -1,10 +1,32 @@
 import os
+import copy
 import json
+import difflib
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.workflows import is_workflow_file
 
 WORKFLOW_DIR = "/workspace/pipeline/workflows"
 
+# Threads used by bulk repair
+MAX_REPAIR_WORKERS = 8
+
+# Runtime placeholders substituted by comfyui.generate_sprites, keyed by
+# node type and input name. Injected when the input is missing or empty.
+PLACEHOLDER_INPUTS: Dict[str, Dict[str, str]] = {
+    "LoadImageSequence": {"directory": "@frames_dir"},
+    "SaveImage": {"directory": "@output_dir"},
+    "CheckpointLoaderSimple": {"ckpt_name": "@checkpoint"},
+    "LoraLoader": {"lora_name": "@lora"},
+    "VAELoader": {"vae_name": "@vae"},
+    "ControlNetLoader": {"control_net_name": "@controlnet"},
+    "IPAdapterModelLoader": {"ipadapter_file": "@ipadapter"},
+    "KSampler": {"sampler_name": "@sampler", "cfg": "@cfg_scale"},
+}
+
 
 def _load_json(path: str) -> Optional[Dict[str, Any]]:
     if not os.path.exists(path):
@@ -20,16 +42,10 @@ def _atomic_write(path: str, data: Dict[str, Any]) -> None:
     os.replace(tmp, path)
 
 
-def repair_workflow(path: str) -> Dict[str, Any]:
+def _repair_data(data: Dict[str, Any]) -> List[str]:
     """
-    Attempt to auto-repair a ComfyUI workflow JSON.
-    Returns the repaired data (not yet written).
-    Raises FileNotFoundError if the file does not exist.
+    Repair workflow data in place and return the list of repair actions.
     """
-    data = _load_json(path)
-    if data is None:
-        raise FileNotFoundError(path)
-
     repairs: List[str] = []
 
     # --- Ensure nodes + connections exist ---
@@ -73,14 +89,14 @@ def repair_workflow(path: str) -> Dict[str, Any]:
         if isinstance(nid, int):
             node_ids.append(nid)
 
-    # Helper to get next ID
-    def next_id() -> int:
-        return (max(node_ids) + 1) if node_ids else 1
+    # New IDs count up from the current maximum, computed once
+    next_id = (max(node_ids) + 1) if node_ids else 1
 
     for node in nodes:
         nid = node.get("id")
         if not isinstance(nid, int):
-            nid = next_id()
+            nid = next_id
+            next_id += 1
             node["id"] = nid
             node_ids.append(nid)
             repairs.append(f"Assigned new id {nid} to node missing or invalid 'id'")
@@ -102,6 +118,12 @@ def repair_workflow(path: str) -> Dict[str, Any]:
             node["outputs"] = {}
             repairs.append(f"Node {nid} missing or invalid 'outputs', set to {{}}")
 
+        # Inject runtime placeholders into empty well-known inputs
+        for input_name, placeholder in PLACEHOLDER_INPUTS.get(node["type"], {}).items():
+            if node["inputs"].get(input_name) in (None, ""):
+                node["inputs"][input_name] = placeholder
+                repairs.append(f"Node {nid} input '{input_name}' set to placeholder {placeholder}")
+
     # Sort nodes by ID for stable diffs
     nodes.sort(key=lambda n: n["id"])
     data["nodes"] = nodes
@@ -137,16 +159,29 @@ def repair_workflow(path: str) -> Dict[str, Any]:
         data["connections"] = valid_connections
         repairs.append("Pruned invalid connections")
 
-    # TODO: inject required variables here if desired
-    # e.g., ensure @frames_dir, @output_dir, @prompt, etc.
+    return repairs
 
-    # Attach repair metadata
+
+def _attach_metadata(data: Dict[str, Any], repairs: List[str], path: str) -> None:
     data["_repairs"] = {
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "actions": repairs,
         "source": os.path.basename(path),
     }
 
+
+def repair_workflow(path: str) -> Dict[str, Any]:
+    """
+    Attempt to auto-repair a ComfyUI workflow JSON.
+    Returns the repaired data (not yet written).
+    Raises FileNotFoundError if the file does not exist.
+    """
+    data = _load_json(path)
+    if data is None:
+        raise FileNotFoundError(path)
+
+    repairs = _repair_data(data)
+    _attach_metadata(data, repairs, path)
     return data
 
 
@@ -159,3 +194,97 @@ def repair_workflow_file(name: str) -> Dict[str, Any]:
     repaired = repair_workflow(path)
     _atomic_write(path, repaired)
     return repaired
+
+
+# ----------------------------------------------------------------------
+# Bulk repair
+# ----------------------------------------------------------------------
+def _dump(data: Dict[str, Any]) -> List[str]:
+    return json.dumps(data, indent=4).splitlines(keepends=True)
+
+
+def _plan_repair(path: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Repair one workflow in memory.
+    Returns (report entry, repaired data or None when nothing changed).
+    """
+    name = os.path.basename(path)
+    try:
+        original = _load_json(path)
+        if not isinstance(original, dict):
+            raise ValueError("workflow must be a JSON object")
+    except Exception as e:
+        return {"file": name, "status": "error", "message": str(e)}, None
+
+    repaired = copy.deepcopy(original)
+    repaired.pop("_repairs", None)
+    try:
+        repairs = _repair_data(repaired)
+    except Exception as e:
+        logging.error(f"[WorkflowRepair] Failed to repair {name}: {e}")
+        return {"file": name, "status": "error", "message": f"Cannot repair: {e}"}, None
+
+    before = dict(original)
+    before.pop("_repairs", None)
+    diff = "".join(difflib.unified_diff(
+        _dump(before), _dump(repaired),
+        fromfile=f"a/{name}", tofile=f"b/{name}"
+    ))
+
+    entry = {
+        "file": name,
+        "status": "changed" if repairs else "unchanged",
+        "actions": repairs,
+        "diff": diff
+    }
+    if not repairs:
+        return entry, None
+
+    _attach_metadata(repaired, repairs, path)
+    return entry, repaired
+
+
+def repair_all(dry_run: bool = True, names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Repair every workflow in WORKFLOW_DIR (or just `names`) in parallel.
+
+    All repairs are computed before anything is written, and the combined
+    per-file report (actions + unified diff) is returned. With
+    dry_run=False the changed files are then written atomically; nothing is
+    written if any workflow failed to load.
+    """
+    if names is None:
+        try:
+            names = sorted(
+                f for f in os.listdir(WORKFLOW_DIR)
+                if is_workflow_file(f)
+            )
+        except FileNotFoundError:
+            names = []
+
+    paths = [os.path.join(WORKFLOW_DIR, os.path.basename(n)) for n in names]
+
+    planned: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]] = []
+    if paths:
+        with ThreadPoolExecutor(max_workers=min(MAX_REPAIR_WORKERS, len(paths))) as pool:
+            planned = list(pool.map(_plan_repair, paths))
+
+    report = [entry for entry, _ in planned]
+    failed = [entry for entry in report if entry["status"] == "error"]
+    changed = [(entry, data) for entry, data in planned if data is not None]
+
+    written = []
+    if not dry_run and not failed:
+        for entry, data in changed:
+            _atomic_write(os.path.join(WORKFLOW_DIR, entry["file"]), data)
+            written.append(entry["file"])
+        logging.info(f"[WorkflowRepair] Repaired {len(written)} of {len(report)} workflows")
+
+    return {
+        "status": "error" if failed else "ok",
+        "dry_run": dry_run,
+        "workflows": report,
+        "changed": [entry["file"] for entry, _ in changed],
+        "written": written,
+        "diff": "".join(entry.get("diff", "") for entry in report)
+    }
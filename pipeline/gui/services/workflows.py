@@ -1,9 +1,18 @@
 import os
+import copy
 import json
+import atexit
 import logging
+import threading
+
+from services.graph_validator import analyze_graph
+from services.node_catalog import required_inputs
 
 WORKFLOW_DIR = "/workspace/pipeline/workflows"
 
+# Seconds of editor inactivity before patched workflows are written back
+SAVE_DEBOUNCE = 1.0
+
 # Files that should NOT appear in the workflow list
 EXCLUDED_FILES = {
     "style_presets.json",
@@ -13,6 +22,26 @@ EXCLUDED_FILES = {
 }
 
 
+# Open workflow documents shared by load/save/patch:
+# { name: {"data", "version", "stamp", "dirty", "timer"} }
+# "data" is never mutated in place; patches build a new copy, so readers
+# can keep using the object they were handed.
+_DOCS = {}
+_DOCS_LOCK = threading.Lock()
+
+
+class PatchError(ValueError):
+    """Raised when a patch operation cannot be applied."""
+
+
+class VersionConflict(Exception):
+    """Raised when a patch targets an outdated workflow version."""
+
+    def __init__(self, version):
+        super().__init__(f"Workflow is at version {version}")
+        self.version = version
+
+
 def _safe_json_load(path):
     """Safely load JSON with error handling."""
     try:
@@ -28,6 +57,106 @@ def _sanitize_name(name: str):
     return os.path.basename(name)
 
 
+def _atomic_write(path: str, data: dict):
+    """Write JSON atomically to avoid corruption."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp, path)
+
+
+def _stamp(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _get_doc(name: str):
+    """
+    Return the open document for a workflow, (re)loading it from disk when
+    it is not cached or the file changed underneath a clean copy.
+    Must be called with _DOCS_LOCK held.
+    """
+    path = os.path.join(WORKFLOW_DIR, name)
+    doc = _DOCS.get(name)
+
+    if doc and doc["dirty"]:
+        return doc
+
+    stamp = _stamp(path)
+    if stamp is None:
+        return None
+
+    if doc and doc["stamp"] == stamp:
+        return doc
+
+    data = _safe_json_load(path)
+    if data is None:
+        return None
+
+    version = doc["version"] + 1 if doc else 1
+    doc = {"data": data, "version": version, "stamp": stamp, "dirty": False, "timer": None}
+    _DOCS[name] = doc
+    return doc
+
+
+def _flush(name: str):
+    """Write a dirty document back to disk atomically."""
+    with _DOCS_LOCK:
+        doc = _DOCS.get(name)
+        if not doc or not doc["dirty"]:
+            return
+
+        path = os.path.join(WORKFLOW_DIR, name)
+        try:
+            _atomic_write(path, doc["data"])
+            doc["dirty"] = False
+            doc["stamp"] = _stamp(path)
+            logging.info(f"[Workflows] Flushed workflow {name} at version {doc['version']}")
+        except Exception as e:
+            logging.error(f"[Workflows] Failed to flush workflow {name}: {e}")
+        finally:
+            doc["timer"] = None
+
+
+def _schedule_flush(name: str, doc: dict):
+    """(Re)start the debounce timer for a document. Must hold _DOCS_LOCK."""
+    if doc["timer"]:
+        doc["timer"].cancel()
+
+    timer = threading.Timer(SAVE_DEBOUNCE, _flush, args=(name,))
+    timer.daemon = True
+    doc["timer"] = timer
+    timer.start()
+
+
+def flush_workflow(name: str):
+    """Write one workflow's pending patches now, for readers of the file."""
+    _flush(_sanitize_name(name))
+
+
+def flush_all():
+    """Write every pending patched workflow immediately."""
+    with _DOCS_LOCK:
+        names = [n for n, d in _DOCS.items() if d["dirty"]]
+    for name in names:
+        _flush(name)
+
+
+atexit.register(flush_all)
+
+
+def is_workflow_file(name: str):
+    """True for workflow JSON files (not configs or saved projects)."""
+    return (
+        name.endswith(".json")
+        and name not in EXCLUDED_FILES
+        and not name.startswith("project_")
+    )
+
+
 def list_workflows():
     """Return only valid workflow JSON files."""
     try:
@@ -36,12 +165,7 @@ def list_workflows():
         logging.error(f"[Workflows] Failed to list workflow directory: {e}")
         return []
 
-    workflows = [
-        f for f in files
-        if f.endswith(".json")
-        and f not in EXCLUDED_FILES
-        and not f.startswith("project_")
-    ]
+    workflows = [f for f in files if is_workflow_file(f)]
 
     workflows.sort()
     logging.info(f"[Workflows] Found {len(workflows)} workflows")
@@ -49,38 +173,256 @@ def list_workflows():
 
 
 def load_workflow(name: str):
-    """Load a workflow JSON file safely."""
-    name = _sanitize_name(name)
-    path = os.path.join(WORKFLOW_DIR, name)
+    """Load a workflow JSON file safely, including unflushed patches."""
+    data, _ = load_workflow_versioned(name)
+    return data
 
-    if not os.path.exists(path):
-        logging.warning(f"[Workflows] Workflow not found: {name}")
-        return None
 
-    data = _safe_json_load(path)
-    if data is None:
-        return None
+def load_workflow_versioned(name: str):
+    """
+    Return (data, version) for a workflow, or (None, None) if missing.
+    The returned data must be treated as read-only.
+    """
+    name = _sanitize_name(name)
 
-    logging.info(f"[Workflows] Loaded workflow: {name}")
-    return data
+    with _DOCS_LOCK:
+        doc = _get_doc(name)
+        if doc is None:
+            logging.warning(f"[Workflows] Workflow not found: {name}")
+            return None, None
+        return doc["data"], doc["version"]
 
 
 def save_workflow(name: str, data: dict):
-    """Save a workflow JSON file safely."""
+    """
+    Save a whole workflow atomically, replacing any pending patches.
+    Returns the new version, or None on failure.
+    """
     name = _sanitize_name(name)
     path = os.path.join(WORKFLOW_DIR, name)
 
+    with _DOCS_LOCK:
+        try:
+            _atomic_write(path, data)
+        except Exception as e:
+            logging.error(f"[Workflows] Failed to save workflow {name}: {e}")
+            return None
+
+        doc = _DOCS.get(name)
+        if doc and doc["timer"]:
+            doc["timer"].cancel()
+
+        version = doc["version"] + 1 if doc else 1
+        _DOCS[name] = {
+            "data": data,
+            "version": version,
+            "stamp": _stamp(path),
+            "dirty": False,
+            "timer": None
+        }
+
+    logging.info(f"[Workflows] Saved workflow: {name} (version {version})")
+    return version
+
+
+# ----------------------------------------------------------------------
+# Incremental patches
+# ----------------------------------------------------------------------
+def _split_path(path: str):
+    """Split a JSON-Pointer style path into unescaped segments."""
+    if not isinstance(path, str) or not path.startswith("/"):
+        raise PatchError(f"Invalid path: {path!r}")
+    return [seg.replace("~1", "/").replace("~0", "~") for seg in path[1:].split("/")]
+
+
+def _set_in(container, segments, value, op):
+    """Apply add/replace/remove at a nested location inside a node copy."""
+    for seg in segments[:-1]:
+        try:
+            container = container[int(seg)] if isinstance(container, list) else container[seg]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise PatchError(f"Path segment not found: {seg}")
+
+    last = segments[-1]
     try:
-        with open(path, "w") as f:
-            json.dump(data, f, indent=4)
-        logging.info(f"[Workflows] Saved workflow: {name}")
-        return True
-    except Exception as e:
-        logging.error(f"[Workflows] Failed to save workflow {name}: {e}")
-        return False
+        if isinstance(container, list):
+            idx = len(container) if last == "-" else int(last)
+            if op == "remove":
+                del container[idx]
+            elif op == "add":
+                container.insert(idx, value)
+            else:
+                container[idx] = value
+        elif isinstance(container, dict):
+            if op == "remove":
+                del container[last]
+            elif op == "replace" and last not in container:
+                raise PatchError(f"Cannot replace missing key: {last}")
+            else:
+                container[last] = value
+        else:
+            raise PatchError(f"Cannot index into {type(container).__name__}")
+    except (KeyError, IndexError, ValueError):
+        raise PatchError(f"Path segment not found: {last}")
+
+
+def _apply_ops(data: dict, ops: list):
+    """
+    Apply patch operations to a copy of `data` and return the copy.
+    Untouched nodes are shared with the original; touched nodes are
+    deep-copied first, so the original is never modified.
+    """
+    nodes = list(data.get("nodes", []))
+    connections = list(data.get("connections", []))
+    positions = {str(n.get("id")): i for i, n in enumerate(nodes)}
+    copied = set()
+    removed_nodes = set()
+
+    for op in ops:
+        if not isinstance(op, dict):
+            raise PatchError("Each operation must be an object")
+
+        kind = op.get("op")
+        if kind not in ("add", "replace", "remove"):
+            raise PatchError(f"Unsupported op: {kind}")
+
+        segments = _split_path(op.get("path"))
+        value = op.get("value")
+
+        # /connections
+        if segments == ["connections"]:
+            if not isinstance(value, list) or len(value) < 4:
+                raise PatchError("Connection value must be [src, src_out, dst, dst_in]")
+            if kind == "add":
+                connections.append(value)
+            elif kind == "remove":
+                if value not in connections:
+                    raise PatchError(f"Connection not found: {value}")
+                connections.remove(value)
+            else:
+                raise PatchError("Use add/remove for connections")
+            continue
+
+        if segments[0] != "nodes":
+            raise PatchError(f"Unsupported path: {op.get('path')}")
+
+        # /nodes
+        if len(segments) == 1:
+            if kind != "add" or not isinstance(value, dict) or "id" not in value:
+                raise PatchError("Adding a node requires an object with an 'id'")
+            nid = str(value["id"])
+            if nid in positions:
+                raise PatchError(f"Node {nid} already exists")
+            positions[nid] = len(nodes)
+            nodes.append(copy.deepcopy(value))
+            copied.add(nid)
+            continue
+
+        nid = segments[1]
+        if nid not in positions:
+            raise PatchError(f"Node not found: {nid}")
+
+        # /nodes/<id>
+        if len(segments) == 2:
+            if kind == "remove":
+                nodes[positions.pop(nid)] = None
+                removed_nodes.add(nid)
+            elif kind == "replace":
+                if not isinstance(value, dict) or str(value.get("id")) != nid:
+                    raise PatchError("Replacing a node requires an object with the same 'id'")
+                nodes[positions[nid]] = copy.deepcopy(value)
+                copied.add(nid)
+            else:
+                raise PatchError(f"Node {nid} already exists")
+            continue
+
+        # /nodes/<id>/<field>/...
+        if segments[2] == "id":
+            raise PatchError("Node ids cannot be changed")
+
+        idx = positions[nid]
+        if nid not in copied:
+            nodes[idx] = copy.deepcopy(nodes[idx])
+            copied.add(nid)
+        _set_in(nodes[idx], segments[2:], copy.deepcopy(value), kind)
+
+    if removed_nodes:
+        nodes = [n for n in nodes if n is not None]
+        connections = [
+            c for c in connections
+            if len(c) < 4 or (str(c[0]) not in removed_nodes and str(c[2]) not in removed_nodes)
+        ]
+
+        # Inline [id, slot] links to a removed node are cleared as well
+        for idx, node in enumerate(nodes):
+            inputs = node.get("inputs")
+            if not isinstance(inputs, dict):
+                continue
+            dangling = [
+                name for name, value in inputs.items()
+                if isinstance(value, (list, tuple)) and len(value) == 2
+                and isinstance(value[1], int) and str(value[0]) in removed_nodes
+            ]
+            if not dangling:
+                continue
+            nid = str(node.get("id"))
+            if nid not in copied:
+                nodes[idx] = node = copy.deepcopy(node)
+                copied.add(nid)
+            for name in dangling:
+                node["inputs"][name] = None
+
+    return {**data, "nodes": nodes, "connections": connections}
+
+
+def patch_workflow(name: str, ops: list, base_version=None):
+    """
+    Apply JSON-Patch style node/connection edits to the in-memory copy
+    of a workflow and schedule a debounced atomic write.
+
+    Paths address nodes by id, e.g. "/nodes/3/inputs/seed" or
+    "/nodes/3/position"; "/nodes" (add) and "/connections" (add/remove)
+    manage the lists. Removing a node drops its connections and sets
+    inline [id, slot] inputs that linked to it to null. All operations
+    apply or none do.
+
+    Raises VersionConflict if base_version is given and stale,
+    PatchError for invalid operations. Returns the new version, or None
+    if the workflow does not exist.
+    """
+    name = _sanitize_name(name)
+    if not isinstance(ops, list):
+        raise PatchError("'ops' must be a list")
+
+    with _DOCS_LOCK:
+        doc = _get_doc(name)
+        if doc is None:
+            return None
+
+        if base_version is not None and base_version != doc["version"]:
+            raise VersionConflict(doc["version"])
+
+        doc["data"] = _apply_ops(doc["data"], ops)
+        doc["version"] += 1
+        doc["dirty"] = True
+        _schedule_flush(name, doc)
+
+        version = doc["version"]
+
+    logging.info(f"[Workflows] Patched workflow {name}: {len(ops)} ops -> version {version}")
+    return version
 
 
 def validate_workflow(data: dict):
+    """
+    Validate workflow structure and graph.
+    Returns (ok, message); see validate_workflow_graph for the full report.
+    """
+    ok, message, _ = validate_workflow_graph(data)
+    return ok, message
+
+
+def validate_workflow_graph(data: dict):
     """
     Validate workflow structure.
     Must contain:
@@ -91,28 +433,42 @@ def validate_workflow(data: dict):
       - type
       - inputs
       - outputs
+    The graph must also be acyclic with unique node IDs and connected
+    inputs, including the required inputs the node catalog knows about
+    (see graph_validator.analyze_graph).
+
+    Returns (ok, message, report) where report is the graph analysis,
+    or None if the structure check already failed.
     """
     if not isinstance(data, dict):
-        return False, "Workflow must be a JSON object"
+        return False, "Workflow must be a JSON object", None
 
     if "nodes" not in data:
-        return False, "Missing 'nodes' field"
+        return False, "Missing 'nodes' field", None
     if "connections" not in data:
-        return False, "Missing 'connections' field"
+        return False, "Missing 'connections' field", None
 
     nodes = data["nodes"]
     if not isinstance(nodes, list):
-        return False, "'nodes' must be a list"
+        return False, "'nodes' must be a list", None
+    if not isinstance(data["connections"], list):
+        return False, "'connections' must be a list", None
 
     for node in nodes:
+        if not isinstance(node, dict):
+            return False, "Node must be a JSON object", None
         if "id" not in node:
-            return False, "Node missing 'id'"
+            return False, "Node missing 'id'", None
         if "type" not in node:
-            return False, f"Node {node.get('id')} missing 'type'"
+            return False, f"Node {node.get('id')} missing 'type'", None
         if "inputs" not in node:
-            return False, f"Node {node.get('id')} missing 'inputs'"
+            return False, f"Node {node.get('id')} missing 'inputs'", None
         if "outputs" not in node:
-            return False, f"Node {node.get('id')} missing 'outputs'"
+            return False, f"Node {node.get('id')} missing 'outputs'", None
+
+    report = analyze_graph(data, required_inputs=required_inputs)
+    if report["errors"]:
+        return False, report["errors"][0], report
 
     logging.info("[Workflows] Workflow validated successfully")
-    return True, "Workflow is valid"
+    return True, "Workflow is valid", report
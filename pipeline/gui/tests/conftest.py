@@ -0,0 +1,10 @@
+import os
+import sys
+
+GUI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.dirname(os.path.dirname(GUI_DIR))
+
+# app.py imports "services.*" and file_browser.py lives at the repo root
+for path in (GUI_DIR, REPO_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
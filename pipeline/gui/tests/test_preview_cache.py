@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+import app as gui_app
+import file_browser
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def sample(tmp_path):
+    path = tmp_path / "frame.png"
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def gui_client(monkeypatch):
+    # No log file under /workspace and no background workers in tests
+    monkeypatch.setattr(gui_app.os, "makedirs", lambda *a, **k: None)
+    monkeypatch.setattr(gui_app.logging, "basicConfig", lambda *a, **k: None)
+    for name in ("start_background_hasher", "start_background_refresh", "start_file_indexer"):
+        monkeypatch.setattr(gui_app, name, lambda: None)
+    return gui_app.create_app().test_client()
+
+
+@pytest.fixture
+def browser_client(monkeypatch, sample):
+    monkeypatch.setattr(file_browser, "BASE_DIR", str(sample.parent))
+    return file_browser.app.test_client()
+
+
+@pytest.fixture(params=["preview_video", "preview_frame", "preview_sheet", "download"])
+def fetch(request, sample, gui_client, browser_client):
+    """Return get(headers) for one file-serving route, all serving `sample`."""
+    if request.param == "download":
+        return lambda headers=None: browser_client.get(f"/download/{sample.name}", headers=headers or {})
+
+    route = "/api/preview/" + request.param.split("_", 1)[1]
+    return lambda headers=None: gui_client.get(route, query_string={"path": str(sample)}, headers=headers or {})
+
+
+def test_full_response_has_cache_headers(fetch):
+    r = fetch()
+    assert r.status_code == 200
+    assert r.data == CONTENT
+    assert r.headers["ETag"]
+    assert r.headers["Last-Modified"]
+    assert r.headers["Accept-Ranges"] == "bytes"
+    assert "max-age=60" in r.headers["Cache-Control"]
+
+
+def test_byte_range(fetch):
+    r = fetch({"Range": "bytes=0-9"})
+    assert r.status_code == 206
+    assert r.data == CONTENT[:10]
+    assert r.headers["Content-Range"] == f"bytes 0-9/{len(CONTENT)}"
+
+
+def test_suffix_range(fetch):
+    r = fetch({"Range": "bytes=-16"})
+    assert r.status_code == 206
+    assert r.data == CONTENT[-16:]
+    assert r.headers["Content-Range"] == f"bytes {len(CONTENT) - 16}-{len(CONTENT) - 1}/{len(CONTENT)}"
+
+
+def test_open_ended_range(fetch):
+    r = fetch({"Range": "bytes=1000-"})
+    assert r.status_code == 206
+    assert r.data == CONTENT[1000:]
+    assert r.headers["Content-Range"] == f"bytes 1000-{len(CONTENT) - 1}/{len(CONTENT)}"
+
+
+def test_unsatisfiable_range(fetch):
+    r = fetch({"Range": f"bytes={len(CONTENT)}-"})
+    assert r.status_code == 416
+    assert r.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_if_none_match_returns_304(fetch):
+    etag = fetch().headers["ETag"]
+    r = fetch({"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.data == b""
+
+
+def test_stale_if_range_returns_full_body(fetch, sample):
+    etag = fetch().headers["ETag"]
+    st = sample.stat()
+    os.utime(sample, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    r = fetch({"Range": "bytes=0-9", "If-Range": etag})
+    assert r.status_code == 200
+    assert r.data == CONTENT
+
+
+def test_etag_changes_with_mtime(fetch, sample):
+    etag = fetch().headers["ETag"]
+    st = sample.stat()
+    os.utime(sample, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+
+    r = fetch({"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
+def test_etag_changes_with_size(fetch, sample):
+    etag = fetch().headers["ETag"]
+    st = sample.stat()
+    with open(sample, "ab") as f:
+        f.write(b"more")
+    os.utime(sample, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    r = fetch({"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.data == CONTENT + b"more"